@@ -7,6 +7,7 @@ from typing import Any, Dict, List, Optional
 
 import cv2
 import numpy as np
+import orjson
 from fastapi import (
     APIRouter,
     Depends,
@@ -35,7 +36,9 @@ from app.app.schemas import DriverEventOut, DriverEventReview, ViolationOut, Vio
 from sqlalchemy import select, desc
 from app.app.services.alert_service import AlertService
 from app.app.services.compliance_service import ComplianceService
+from app.app.services.inference_worker import BatcherSaturated
 from app.app.services.model_registry import get_yolo_model
+from app.app.services.result_cache import image_digest
 
 router = APIRouter()
 compliance_service = ComplianceService()
@@ -69,41 +72,45 @@ async def detect_objects(
     contents = await file.read()
     try:
         model = get_yolo_model()
-        detections = await run_in_threadpool(model.predict, contents)
+        try:
+            detections = await model.predict_async(contents)
+        except BatcherSaturated:
+            raise HTTPException(status_code=503, detail="Inference queue full, retry shortly")
         
-        # Save Detection to DB
-        db_detection = Detection(result=detections)
+        # Save Detection to DB (flush assigns the id without a separate commit)
+        db_detection = Detection(image_hash=image_digest(contents), result=detections)
         db.add(db_detection)
-        await db.commit()
-        await db.refresh(db_detection)
+        await db.flush()
         
         # Check Compliance
         violations = compliance_service.check_compliance(detections)
         
-        # Save Incidents
-        for violation in violations:
-            incident = Incident(
+        # Save Incidents: one batched insert + a single commit per request
+        db.add_all([
+            Incident(
                 detection_id=db_detection.id,
                 violation_type=violation['violation_type'],
                 severity=violation['severity'],
                 details=violation['details']
             )
-            db.add(incident)
-            
-            # Send real-time alert via Slack
-            alert_service.send_alert(
+            for violation in violations
+        ])
+        await db.commit()
+        
+        for violation in violations:
+            # Send real-time alert via Slack (fire-and-forget, doesn't block the response)
+            alert_service.send_alert_nowait(
                 violation_type=violation['violation_type'],
                 details=violation['details']
             )
-            
-        if violations:
-            await db.commit()
         
         return {
             "detections": detections,
             "violations": violations,
             "compliant": len(violations) == 0
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -224,7 +231,6 @@ async def websocket_ppe_stream(websocket: WebSocket, db: AsyncSession = Depends(
     await websocket.send_json({"type": "ready"})
     model = get_yolo_model()
     compliance = ComplianceService()
-    loop = asyncio.get_running_loop()
     frame_counter = 0
 
     try:
@@ -269,7 +275,12 @@ async def websocket_ppe_stream(websocket: WebSocket, db: AsyncSession = Depends(
 
             start = time.perf_counter()
             print(f"DEBUG_WS: Sending to model.predict...", flush=True)
-            detections = await loop.run_in_executor(None, lambda: model.predict(buffer.tobytes()))
+            try:
+                detections = await model.detect_async(buffer.tobytes())
+            except BatcherSaturated:
+                # Saturated: drop this frame so the stream stays live
+                await websocket.send_json({"type": "error", "message": "Frame dropped (busy)", "frame_id": frame_id})
+                continue
             latency_ms = (time.perf_counter() - start) * 1000.0
             print(f"DEBUG_WS: Inference complete. Detections: {len(detections)}. Latency: {latency_ms:.2f}ms", flush=True)
 
@@ -278,8 +289,12 @@ async def websocket_ppe_stream(websocket: WebSocket, db: AsyncSession = Depends(
             display_w = int(payload.get("display_width") or capture_w)
             display_h = int(payload.get("display_height") or capture_h)
 
-            scaled_detections = _scale_detections(detections, capture_w, capture_h, display_w, display_h)
-            violations = compliance.check_compliance(detections)
+            # Boxes stay one array until the response: scale, then build dicts once
+            src_w, src_h = (capture_w, capture_h) if capture_w > 0 and capture_h > 0 else (display_w, display_h)
+            scaled_detections = detections.scaled(
+                display_w / max(src_w, 1), display_h / max(src_h, 1)
+            ).to_list()
+            violations = compliance.check_detections(detections)
             if violations:
                 await compliance.save_violations(violations, frame, db, session_id=session_id)
 
@@ -292,7 +307,7 @@ async def websocket_ppe_stream(websocket: WebSocket, db: AsyncSession = Depends(
                     "latency_ms": round(latency_ms, 2),
                 }
             # print(f"DEBUG_WS: Sending response: {json.dumps(response)[:100]}...", flush=True)
-            await websocket.send_json(response)
+            await _send_json_fast(websocket, response)
     except WebSocketDisconnect:
         pass
     except Exception as exc:
@@ -304,6 +319,12 @@ async def websocket_ppe_stream(websocket: WebSocket, db: AsyncSession = Depends(
         raise
 
 
+async def _send_json_fast(websocket: WebSocket, payload: Dict[str, Any]) -> None:
+    """Per-frame results: orjson (C encoder) instead of stdlib json, same text frame."""
+    data = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    await websocket.send_text(data.decode())
+
+
 def _decode_base64_frame(image_b64: str):
     if "," in image_b64:
         image_b64 = image_b64.split(",", 1)[1]
@@ -424,7 +445,7 @@ async def websocket_driver_stream(websocket: WebSocket):
                 "detections": scaled_detections,
             }
             
-            await websocket.send_json(response)
+            await _send_json_fast(websocket, response)
 
     except WebSocketDisconnect:
         print("Driver WebSocket disconnected", flush=True)
@@ -589,7 +610,7 @@ async def websocket_driver_stream_v2(websocket: WebSocket, db: AsyncSession = De
             result["timestamp"] = timestamp
             result["latency_ms"] = round(latency_ms, 2)
 
-            await websocket.send_json(result)
+            await _send_json_fast(websocket, result)
 
     except WebSocketDisconnect:
         print("Driver v2 WebSocket disconnected", flush=True)
@@ -852,11 +873,31 @@ async def websocket_front_cam_stream(websocket: WebSocket):
             
             image_bytes = buffer.tobytes()
             capture_w = payload.get("capture_width", 640)
+
+            # Optional rear frame in the same message: both cameras go through
+            # one batched forward pass instead of two separate model calls.
+            rear_bytes = None
+            rear_b64 = payload.get("rear_image")
+            if rear_b64:
+                rear_frame = _decode_base64_frame(rear_b64)
+                if rear_frame is not None:
+                    ok, rear_buffer = cv2.imencode(".jpg", rear_frame)
+                    if ok:
+                        rear_bytes = rear_buffer.tobytes()
+                        # Rear boxes are in the rear frame's own pixel space
+                        rear_h, rear_w = rear_frame.shape[:2]
             
             start_time = time.time()
-            results = await loop.run_in_executor(
-                None, road_model.analyze_front_camera, image_bytes, capture_w
-            )
+            rear_results = None
+            if rear_bytes is not None:
+                both = await loop.run_in_executor(
+                    None, road_model.analyze_both, image_bytes, rear_bytes, capture_w, rear_w
+                )
+                results, rear_results = both["front"], both["rear"]
+            else:
+                results = await loop.run_in_executor(
+                    None, road_model.analyze_front_camera, image_bytes, capture_w
+                )
             latency_ms = (time.time() - start_time) * 1000
             
             # Scale detections
@@ -884,8 +925,26 @@ async def websocket_front_cam_stream(websocket: WebSocket):
                 "lead_vehicle": results.get("lead_vehicle"),
                 "ttc": results.get("ttc"),
             }
+            if rear_results is not None:
+                # The rear view has its own resolution and canvas; without an
+                # explicit rear display size its boxes stay in rear-frame pixels
+                rear_display_w = payload.get("rear_display_width", rear_w)
+                rear_display_h = payload.get("rear_display_height", rear_h)
+                response["rear"] = {
+                    "detections": _scale_detections(
+                        rear_results.get("detections", []),
+                        rear_w, rear_h, rear_display_w, rear_display_h
+                    ),
+                    "alerts": rear_results.get("alerts", []),
+                    "risk_level": rear_results.get("risk_level", "low"),
+                    "safe_to_maneuver": rear_results.get("safe_to_maneuver", True),
+                    "closest_vehicle_distance": rear_results.get("closest_vehicle_distance"),
+                    "approaching_vehicles": rear_results.get("approaching_vehicles", []),
+                    "approach_speed_kmh": rear_results.get("approach_speed_kmh", 0),
+                    "approach_status": rear_results.get("approach_status", "stable"),
+                }
             
-            await websocket.send_json(response)
+            await _send_json_fast(websocket, response)
 
     except WebSocketDisconnect:
         print("Front camera WebSocket disconnected", flush=True)
@@ -974,7 +1033,7 @@ async def websocket_rear_cam_stream(websocket: WebSocket):
                 "approach_status": results.get("approach_status", "stable"),
             }
             
-            await websocket.send_json(response)
+            await _send_json_fast(websocket, response)
 
     except WebSocketDisconnect:
         print("Rear camera WebSocket disconnected", flush=True)
@@ -1090,7 +1149,7 @@ async def websocket_ergonomics_stream(websocket: WebSocket):
                 "risk_level": results.get("risk_level", "low"),
             }
             
-            await websocket.send_json(response)
+            await _send_json_fast(websocket, response)
 
     except WebSocketDisconnect:
         print("Ergonomics WebSocket disconnected", flush=True)
@@ -1166,7 +1225,7 @@ async def websocket_vehicle_control_stream(websocket: WebSocket):
                 "risk_level": results.get("risk_level", "low"),
             }
             
-            await websocket.send_json(response)
+            await _send_json_fast(websocket, response)
 
     except WebSocketDisconnect:
         print("Vehicle Control WebSocket disconnected", flush=True)
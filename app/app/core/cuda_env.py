@@ -0,0 +1,9 @@
+"""CUDA environment defaults.
+
+Imported for its side effect at the top of main.py, before anything imports
+torch: CUDA reads these variables once, when it initializes.
+"""
+import os
+
+# Load CUDA kernels on first use instead of all at init (smaller RSS, faster start)
+os.environ.setdefault("CUDA_MODULE_LOADING", "LAZY")
@@ -0,0 +1,41 @@
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+
+def start_queue_logging(level: int = logging.INFO) -> QueueListener:
+    """Route root-logger records through a queue so formatting and stream
+    writes happen on the listener thread instead of the request/inference path.
+
+    Existing root handlers are moved behind the listener; if there are none, a
+    stderr StreamHandler is used.
+    """
+    root = logging.getLogger()
+    handlers = [h for h in root.handlers if not isinstance(h, QueueHandler)]
+    if not handlers:
+        stream = logging.StreamHandler()
+        stream.setFormatter(logging.Formatter("%(levelname)s: %(name)s: %(message)s"))
+        handlers = [stream]
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level)
+    listener.start()
+    return listener
+
+
+def stop_queue_logging(listener: Optional[QueueListener]) -> None:
+    """Flush pending records and put the original handlers back on the root logger."""
+    if listener is None:
+        return
+    listener.stop()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, QueueHandler):
+            root.removeHandler(handler)
+    for handler in listener.handlers:
+        root.addHandler(handler)
@@ -3,8 +3,9 @@ Lightweight, idempotent schema upgrades run at startup.
 
 `Base.metadata.create_all` creates missing TABLES but never adds COLUMNS to
 existing ones. The auth/roles feature adds columns to `users`, so on databases
-created before it we issue the ALTER TABLE statements ourselves. Safe to run
-on every boot (checks current columns first); works on SQLite and Postgres.
+created before it we issue the ALTER TABLE statements ourselves. Likewise for
+indexes added to existing tables. Safe to run on every boot (checks current
+columns/indexes first); works on SQLite and Postgres.
 """
 from __future__ import annotations
 
@@ -38,3 +39,34 @@ def _upgrade_sync(sync_conn) -> None:
         if col not in existing:
             sync_conn.exec_driver_sql(f"ALTER TABLE users ADD COLUMN {col} {ddl}")
             print(f"INFO: migrate_lite added users.{col}", flush=True)
+
+
+async def ensure_indexes(engine: AsyncEngine) -> None:
+    """Create indexes declared on models whose tables predate them."""
+    async with engine.begin() as conn:
+        await conn.run_sync(_create_indexes_sync)
+
+
+def _create_indexes_sync(sync_conn) -> None:
+    from app.app.db.models import Detection, Incident
+    from app.app.security.honeytokens.models import HoneyToken, HoneyTokenEvent
+    from app.app.security.llm_gateway.models import LlmAudit
+
+    if sync_conn.dialect.name == "postgresql":
+        # detections.result moved from JSON to JSONB (needed for the GIN index)
+        data_type = sync_conn.exec_driver_sql(
+            "SELECT data_type FROM information_schema.columns "
+            "WHERE table_name = 'detections' AND column_name = 'result'"
+        ).scalar()
+        if data_type == "json":
+            sync_conn.exec_driver_sql(
+                "ALTER TABLE detections ALTER COLUMN result TYPE JSONB USING result::jsonb"
+            )
+            print("INFO: migrate_lite converted detections.result to JSONB", flush=True)
+
+    for table in (
+        Detection.__table__, Incident.__table__, LlmAudit.__table__,
+        HoneyToken.__table__, HoneyTokenEvent.__table__,
+    ):
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
@@ -1,5 +1,6 @@
 import enum
-from sqlalchemy import Column, Integer, String, DateTime, JSON, Boolean, Enum, Float, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Boolean, Enum, Float, ForeignKey, Index, Text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.app.db.database import Base
@@ -10,7 +11,13 @@ class Detection(Base):
     id = Column(Integer, primary_key=True, index=True)
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
     image_hash = Column(String, index=True, nullable=True) # To avoid duplicates if needed
-    result = Column(JSON) # Store the full JSON result from YOLO
+    # Full JSON result from YOLO; binary JSONB (GIN-indexed) on Postgres
+    result = Column(JSON().with_variant(JSONB(), "postgresql"))
+
+    __table_args__ = (
+        Index("ix_detections_timestamp", "timestamp"),
+        Index("ix_detections_result_gin", "result", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
 
 class Incident(Base):
     __tablename__ = "incidents"
@@ -22,6 +29,9 @@ class Incident(Base):
     severity = Column(String) # "HIGH", "MEDIUM", "LOW"
     details = Column(JSON) # Specifics about the violation
 
+    # Dashboard/alert queries filter by recent window and violation type
+    __table_args__ = (Index("ix_incidents_ts_type", "timestamp", "violation_type"),)
+
 class Company(Base):
     __tablename__ = "companies"
 
@@ -177,17 +177,10 @@ def _run_inference(model, frame) -> List[Dict[str, Any]]:
     success, buffer = cv2.imencode(".jpg", resized)
     if not success:
         return []
-    detections = model.predict(buffer.tobytes())
+    detections = model.detect(buffer.tobytes())
     if scale_x != 1.0 or scale_y != 1.0:
-        for det in detections:
-            x1, y1, x2, y2 = det["box"]
-            det["box"] = [
-                x1 * scale_x,
-                y1 * scale_y,
-                x2 * scale_x,
-                y2 * scale_y,
-            ]
-    return detections
+        detections = detections.scaled(scale_x, scale_y)
+    return detections.to_list()
 
 
 def _prepare_inference_frame(frame) -> Tuple[Any, float, float]:
@@ -3,16 +3,20 @@ import os
 import sys
 from contextlib import asynccontextmanager
 
+# Sets the CUDA env defaults; must come before anything imports torch
+from app.app.core import cuda_env  # noqa: F401
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
-from prometheus_fastapi_instrumentator import Instrumentator
+from prometheus_fastapi_instrumentator import Instrumentator, metrics
 
 from app.app.api import jobs_routes, routes, users_routes
+from app.app.core.log_queue import start_queue_logging, stop_queue_logging
 from app.app.db import models  # noqa: F401
 from app.app.db.database import Base, engine
-from app.app.db.migrate_lite import ensure_auth_schema
+from app.app.db.migrate_lite import ensure_auth_schema, ensure_indexes
 from app.app.db.seed_db import seed_users
 from app.app.jobs.cleanup import cleanup_loop
 from app.app.jobs.worker import job_worker_loop
@@ -33,13 +37,38 @@ except Exception as exc:  # pragma: no cover - optional dependency
 if sys.platform == 'win32':
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
+def _preload_models():
+    """Load the PPE/road/vehicle YOLO singletons and warm them up, so the first
+    request doesn't pay for model load, CUDA init and graph capture."""
+    from app.app.services.model_registry import get_yolo_model
+    from app.app.services.road_safety_model_service import get_road_safety_model
+    from app.app.services.vehicle_control_model_service import get_vehicle_control_model
+
+    road_model = get_road_safety_model()
+    get_vehicle_control_model()
+    # Both services share one backbone
+    road_model.backbone.warmup()
+    # PPE model warms itself up at every micro-batch size
+    get_yolo_model()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     import torch
 
+    # Log handlers run on a background thread; the model services log per-frame errors
+    log_listener = start_queue_logging()
+
     print(f"DEBUG: CUDA Available: {torch.cuda.is_available()}", flush=True)
     if torch.cuda.is_available():
         print(f"DEBUG: GPU Name: {torch.cuda.get_device_name(0)}", flush=True)
+        # cuDNN benchmark mode is process-wide: it autotunes once per new input
+        # shape, then reuses the fastest kernels. That pays off here because the
+        # shapes are bounded (PPE at 640 for batches 1..8, the road/vehicle
+        # backbone at 640 or 320 for batches 1..2) and the preload below warms
+        # them all. Set CUDNN_BENCHMARK=0 if models with freely varying input
+        # sizes are added, since each new shape would pay the tuning cost.
+        torch.backends.cudnn.benchmark = os.getenv("CUDNN_BENCHMARK", "1") != "0"
     else:
         print("DEBUG: Running on CPU", flush=True)
 
@@ -61,8 +90,16 @@ async def lifespan(app: FastAPI):
                 raise e
     
     await ensure_auth_schema(engine)
+    await ensure_indexes(engine)
     await seed_users()
 
+    if os.getenv("DISABLE_MODEL_PRELOAD") != "1":
+        try:
+            await asyncio.to_thread(_preload_models)
+            print("INFO: YOLO models preloaded", flush=True)
+        except Exception as e:
+            print(f"WARNING: YOLO preload failed ({e}); models will load on first request", flush=True)
+
     worker_task = (
         asyncio.create_task(job_worker_loop())
         if os.getenv("DISABLE_JOB_WORKER") != "1"
@@ -82,8 +119,13 @@ async def lifespan(app: FastAPI):
             task.cancel()
         if tasks:
             await asyncio.gather(*tasks, return_exceptions=True)
+        await routes.alert_service.aclose()
+        stop_queue_logging(log_listener)
 
-app = FastAPI(title="SiteGuard API", version="0.1.0", lifespan=lifespan)
+# orjson encodes the float-heavy detection payloads several times faster than stdlib json
+app = FastAPI(
+    title="SiteGuard API", version="0.1.0", lifespan=lifespan, default_response_class=ORJSONResponse
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -93,8 +135,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Instrumentator
-Instrumentator().instrument(app).expose(app)
+# Instrumentator: route-template labels, grouped status codes (2xx/4xx/...),
+# a short latency bucket list and no series for the probe/scrape endpoints,
+# to keep the number of exported series (and per-request observe cost) small.
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+Instrumentator(
+    should_group_status_codes=True,
+    should_ignore_untemplated=True,
+    excluded_handlers=["/metrics", "/", "/health", "/static.*"],
+).add(
+    metrics.default(latency_highr_buckets=_LATENCY_BUCKETS)
+).add(
+    metrics.request_size(should_include_status=False)
+).add(
+    metrics.response_size(should_include_status=False)
+).instrument(app).expose(app)
 
 # Include API routers
 app.include_router(routes.router)
@@ -3,7 +3,7 @@ Honeytoken database models.
 """
 import json
 from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Index
 from app.app.db.database import Base
 
 
@@ -22,6 +22,9 @@ class HoneyToken(Base):
     revoked = Column(Boolean, default=False)
     pack_id = Column(String(64), nullable=True, index=True)
 
+    # Trigger endpoints (canary URL, fake key, decoy login) match on type + value
+    __table_args__ = (Index("ix_ht_tokens_type_value", "type", "value_plain"),)
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -47,6 +50,9 @@ class HoneyTokenEvent(Base):
     geo_json = Column(Text, nullable=True)
     context_json = Column(Text, nullable=True)
 
+    # /honeytokens/events?token_id= lists newest first
+    __table_args__ = (Index("ix_ht_events_token_ts", "token_id", "ts"),)
+
     def to_dict(self):
         return {
             "id": self.id,
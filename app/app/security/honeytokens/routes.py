@@ -145,8 +145,7 @@ async def decoy_login_trigger(body: DecoyLoginRequest, request: Request, db: Asy
 # ── Run playbook ──────────────────────────────────
 @honeytoken_router.post("/playbooks/run", response_model=PlaybookResult)
 async def execute_playbook(body: PlaybookRequest, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(HoneyToken).where(HoneyToken.id == body.token_id))
-    token = result.scalars().first()
+    token = await db.get(HoneyToken, body.token_id)
     if not token:
         return PlaybookResult(action=body.action, result="error", details={"error": "Token not found"})
 
@@ -158,8 +157,7 @@ async def execute_playbook(body: PlaybookRequest, db: AsyncSession = Depends(get
 @honeytoken_router.post("/simulate-trigger/{token_id}")
 async def simulate_trigger(token_id: int, request: Request, db: AsyncSession = Depends(get_db)):
     """Demo button: simulate a trigger on any token."""
-    result = await db.execute(select(HoneyToken).where(HoneyToken.id == token_id))
-    token = result.scalars().first()
+    token = await db.get(HoneyToken, token_id)
     if not token:
         return {"error": "Token not found"}
 
@@ -3,12 +3,18 @@ Data Loss Prevention (DLP) detector — PII and secret redaction.
 """
 import re
 import math
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Optional, Pattern, Set, Tuple
+
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
 
 
 # (regex, type, redaction template)
 PII_PATTERNS: List[Tuple[str, str, str]] = [
-    (r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b", "email", "[REDACTED_EMAIL]"),
+    (r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,24}\b", "email", "[REDACTED_EMAIL]"),
     (r"\b\d{3}[-.\s]?\d{3}[-.\s]?\d{4}\b", "phone", "[REDACTED_PHONE]"),
     (r"\b\d{3}[-.\s]?\d{2}[-.\s]?\d{4}\b", "ssn", "[REDACTED_SSN]"),
     (r"\b(?:\d{4}[-\s]?){3}\d{4}\b", "credit_card", "[REDACTED_CC]"),
@@ -26,6 +32,72 @@ SECRET_PATTERNS: List[Tuple[str, str, str]] = [
 ]
 
 
+# Compiled once at import; the string tables above also feed the RE2 set.
+_PII_COMPILED: List[Tuple[Pattern, str, str]] = [
+    (re.compile(pattern), kind, template) for pattern, kind, template in PII_PATTERNS
+]
+_SECRET_COMPILED: List[Tuple[Pattern, str, str]] = [
+    (re.compile(pattern), kind, template) for pattern, kind, template in SECRET_PATTERNS
+]
+
+# Literal every match of a pattern must contain; a cheap ``in`` check skips the
+# regex on text that can't match. The numeric PII patterns all need a digit.
+REQUIRED_LITERALS: Dict[str, str] = {
+    "email": "@",
+    "openai_key": "sk-",
+    "github_token": "ghp_",
+    "aws_access_key": "AKIA",
+    "slack_token": "xox",
+    "google_api_key": "AIza",
+    "bearer_token": "Bearer",
+}
+NUMERIC_TYPES = {"phone", "ssn", "credit_card", "ipv4"}
+_DIGIT = re.compile(r"\d")
+# ASCII characters ``re``'s ``\s`` matches but RE2's (``[\t\n\f\r ]``) doesn't
+_RE2_EXTRA_SPACE = re.compile(r"[\v\x1c-\x1f]")
+
+
+def _build_pattern_set():
+    """Compile every DLP pattern into one RE2 set so a single pass over the
+    text reports which patterns match at all.
+
+    RE2's ``\\d``/``\\s``/``\\b`` are ASCII-only while ``re`` is Unicode-aware,
+    and RE2's ``\\s`` also leaves out ``\\v`` and ``\\x1c``-``\\x1f``, so the set
+    is only a faithful prefilter for ASCII text without those characters."""
+    if not RE2_AVAILABLE:
+        return None
+    pattern_set = re2.Set.SearchSet()
+    for pattern, _, _ in PII_PATTERNS + SECRET_PATTERNS:
+        pattern_set.Add(pattern)
+    pattern_set.Compile()
+    return pattern_set
+
+
+_PATTERN_SET = _build_pattern_set()
+
+
+def _active(
+    patterns: List[Tuple[Pattern, str, str]],
+    offset: int,
+    text: str,
+    matched: Optional[Set[int]],
+    has_digit: bool,
+) -> Iterator[Tuple[Pattern, str, str]]:
+    """Yield the patterns worth running: the RE2 set hits, or without a set match the
+    patterns whose required literal appears in the text."""
+    for idx, entry in enumerate(patterns, offset):
+        kind = entry[1]
+        if matched is not None:
+            if idx not in matched:
+                continue
+        elif kind in NUMERIC_TYPES:
+            if not has_digit:
+                continue
+        elif kind in REQUIRED_LITERALS and REQUIRED_LITERALS[kind] not in text:
+            continue
+        yield entry
+
+
 def _shannon_entropy(s: str) -> float:
     """Calculate Shannon entropy for high-entropy secret detection."""
     if not s:
@@ -43,10 +115,15 @@ def detect_dlp(text: str) -> Dict:
     """
     hits = []
     redacted = text
+    matched = None
+    if _PATTERN_SET is not None and text.isascii() and not _RE2_EXTRA_SPACE.search(text):
+        # Match() returns None rather than an empty list when nothing matches
+        matched = set(_PATTERN_SET.Match(text) or ())
+    has_digit = matched is None and _DIGIT.search(text) is not None
 
     # PII scan
-    for pattern, pii_type, redacted_template in PII_PATTERNS:
-        for match in re.finditer(pattern, text):
+    for regex, pii_type, redacted_template in _active(_PII_COMPILED, 0, text, matched, has_digit):
+        for match in regex.finditer(text):
             original = match.group()
             hits.append({
                 "type": pii_type,
@@ -57,8 +134,10 @@ def detect_dlp(text: str) -> Dict:
             redacted = redacted.replace(original, redacted_template, 1)
 
     # Secret scan
-    for pattern, secret_type, redacted_template in SECRET_PATTERNS:
-        for match in re.finditer(pattern, text):
+    for regex, secret_type, redacted_template in _active(
+        _SECRET_COMPILED, len(PII_PATTERNS), text, matched, has_digit
+    ):
+        for match in regex.finditer(text):
             original = match.group()
             hits.append({
                 "type": secret_type,
@@ -3,31 +3,86 @@ Prompt injection detector — weighted keyword scoring.
 Returns a 0..1 injection score.
 """
 import re
-from typing import Dict, List, Tuple
-
-# (pattern, weight, description)
-INJECTION_SIGNALS: List[Tuple[str, float, str]] = [
-    (r"ignore\s+(previous|all|above|prior|your|the)\s+(instructions?|rules?|prompts?|safety|guidelines?)", 0.40, "Instruction override attempt"),
-    (r"ignore\s+(rules?|instructions?|safety|policies?)", 0.35, "Bare ignore command"),
-    (r"(disregard|forget|bypass)\s+(your|the|all)\s+(instructions?|rules?|guidelines?|policy|safety)", 0.40, "Policy bypass attempt"),
-    (r"(bypass|override|circumvent)\s+(all\s+)?(safety|security|restrictions?|filters?|protections?)", 0.40, "Safety bypass attempt"),
-    (r"act\s+as\s+(a\s+)?(system|admin|root|developer|unrestricted)", 0.30, "Role impersonation"),
-    (r"you\s+are\s+now\s+(a\s+)?", 0.25, "Identity override"),
-    (r"(reveal|show|display|print|output)\s+(your|the|hidden|secret|system|all)\s*(prompt|instructions?|rules?|config)?", 0.45, "System prompt extraction"),
-    (r"(reveal|show|display|print)\s+.{0,20}(system\s*prompt|instructions?|rules?)", 0.40, "Indirect prompt extraction"),
-    (r"pretend\s+(you|that)\s+(are|have|can|don)", 0.20, "Behavioral override"),
-    (r"do\s+not\s+(follow|obey|comply|adhere)", 0.30, "Compliance bypass"),
-    (r"(jailbreak|DAN|developer\s*mode|god\s*mode)", 0.45, "Known jailbreak pattern"),
-    (r"\[system\]|\[INST\]|<<SYS>>|<\|im_start\|>", 0.40, "Prompt format injection"),
-    (r"(translate|encode|convert)\s+.*(base64|hex|rot13|binary)", 0.15, "Encoding evasion"),
-    (r"what\s+(are|is)\s+your\s+(instructions?|rules?|system\s*prompt|constraints?)", 0.30, "Direct instruction probe"),
-    (r"(override|replace|change|modify)\s+(your|the)\s+(persona|behavior|rules?|output)", 0.25, "Behavior modification"),
-    (r"from\s+now\s+on\s+(you|ignore|always|never)", 0.25, "Persistent override"),
-    (r"(sudo|admin|root)\s+(mode|access|override|command)", 0.35, "Privilege escalation"),
-    (r"repeat\s+(everything|all|the\s+text)\s+(above|before|in\s+your)", 0.30, "Content extraction"),
-    (r"ignore\s+.{0,30}(reveal|show|give|output)", 0.35, "Combined ignore + reveal"),
+from typing import Dict, List, Pattern, Set, Tuple
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# (pattern, weight, description, keywords) — every match contains at least one
+# of the lowercase keywords, which lets a single keyword pass pick the regexes to run.
+INJECTION_SIGNALS: List[Tuple[str, float, str, Tuple[str, ...]]] = [
+    (r"ignore\s+(previous|all|above|prior|your|the)\s+(instructions?|rules?|prompts?|safety|guidelines?)", 0.40, "Instruction override attempt", ("ignore",)),
+    (r"ignore\s+(rules?|instructions?|safety|policies?)", 0.35, "Bare ignore command", ("ignore",)),
+    (r"(disregard|forget|bypass)\s+(your|the|all)\s+(instructions?|rules?|guidelines?|policy|safety)", 0.40, "Policy bypass attempt", ("disregard", "forget", "bypass")),
+    (r"(bypass|override|circumvent)\s+(all\s+)?(safety|security|restrictions?|filters?|protections?)", 0.40, "Safety bypass attempt", ("bypass", "override", "circumvent")),
+    (r"act\s+as\s+(a\s+)?(system|admin|root|developer|unrestricted)", 0.30, "Role impersonation", ("act",)),
+    (r"you\s+are\s+now\s+(a\s+)?", 0.25, "Identity override", ("now",)),
+    (r"(reveal|show|display|print|output)\s+(your|the|hidden|secret|system|all)\s*(prompt|instructions?|rules?|config)?", 0.45, "System prompt extraction", ("reveal", "show", "display", "print", "output")),
+    (r"(reveal|show|display|print)\s+.{0,20}(system\s*prompt|instructions?|rules?)", 0.40, "Indirect prompt extraction", ("reveal", "show", "display", "print")),
+    (r"pretend\s+(you|that)\s+(are|have|can|don)", 0.20, "Behavioral override", ("pretend",)),
+    (r"do\s+not\s+(follow|obey|comply|adhere)", 0.30, "Compliance bypass", ("not",)),
+    (r"(jailbreak|DAN|developer\s*mode|god\s*mode)", 0.45, "Known jailbreak pattern", ("jailbreak", "dan", "mode")),
+    (r"\[system\]|\[INST\]|<<SYS>>|<\|im_start\|>", 0.40, "Prompt format injection", ("[system]", "[inst]", "<<sys>>", "<|im_start|>")),
+    (r"(translate|encode|convert)\s+.*(base64|hex|rot13|binary)", 0.15, "Encoding evasion", ("translate", "encode", "convert")),
+    (r"what\s+(are|is)\s+your\s+(instructions?|rules?|system\s*prompt|constraints?)", 0.30, "Direct instruction probe", ("what",)),
+    (r"(override|replace|change|modify)\s+(your|the)\s+(persona|behavior|rules?|output)", 0.25, "Behavior modification", ("override", "replace", "change", "modify")),
+    (r"from\s+now\s+on\s+(you|ignore|always|never)", 0.25, "Persistent override", ("from",)),
+    (r"(sudo|admin|root)\s+(mode|access|override|command)", 0.35, "Privilege escalation", ("sudo", "admin", "root")),
+    (r"repeat\s+(everything|all|the\s+text)\s+(above|before|in\s+your)", 0.30, "Content extraction", ("repeat",)),
+    (r"ignore\s+.{0,30}(reveal|show|give|output)", 0.35, "Combined ignore + reveal", ("ignore",)),
+]
+
+# Compiled once at import: (regex, weight, description, pattern preview)
+_COMPILED_SIGNALS: List[Tuple[Pattern, float, str, str]] = [
+    (re.compile(pattern, re.IGNORECASE), weight, description, pattern[:40])
+    for pattern, weight, description, _ in INJECTION_SIGNALS
 ]
 
+# Prompts are lowercased before matching, so ASCII prompts can use the lowercased
+# patterns case-sensitively; IGNORECASE is kept only for the few non-ASCII
+# letters it folds (e.g. dotless i), which lower() leaves alone.
+_ASCII_SIGNALS: List[Pattern] = [
+    re.compile(pattern.lower()) for pattern, _, _, _ in INJECTION_SIGNALS
+]
+
+# keyword -> indices of the signals it anchors
+_KEYWORD_SIGNALS: Dict[str, Set[int]] = {}
+for _idx, (_, _, _, _keywords) in enumerate(INJECTION_SIGNALS):
+    for _kw in _keywords:
+        _KEYWORD_SIGNALS.setdefault(_kw, set()).add(_idx)
+
+
+def _build_automaton():
+    if not AHOCORASICK_AVAILABLE:
+        return None
+    automaton = ahocorasick.Automaton()
+    for kw in _KEYWORD_SIGNALS:
+        automaton.add_word(kw, kw)
+    automaton.make_automaton()
+    return automaton
+
+
+_AUTOMATON = _build_automaton()
+
+
+def _candidate_signals(text: str, is_ascii: bool) -> Set[int]:
+    """Indices of the signals whose keywords occur in ``text`` (already lowercased)."""
+    if not is_ascii:
+        # IGNORECASE also folds a few non-ASCII letters that a plain keyword
+        # scan would miss, so run every signal.
+        return set(range(len(_COMPILED_SIGNALS)))
+    if _AUTOMATON is not None:
+        found = {kw for _, kw in _AUTOMATON.iter(text)}
+    else:
+        found = {kw for kw in _KEYWORD_SIGNALS if kw in text}
+    candidates: Set[int] = set()
+    for kw in found:
+        candidates |= _KEYWORD_SIGNALS[kw]
+    return candidates
+
 
 def detect_injection(prompt: str) -> Dict:
     """
@@ -38,13 +93,20 @@ def detect_injection(prompt: str) -> Dict:
     hits = []
     total_weight = 0.0
 
-    for pattern, weight, description in INJECTION_SIGNALS:
-        matches = re.findall(pattern, text, re.IGNORECASE)
+    is_ascii = text.isascii()
+    candidates = _candidate_signals(text, is_ascii)
+
+    for idx, (regex, weight, description, preview) in enumerate(_COMPILED_SIGNALS):
+        if idx not in candidates:
+            continue
+        if is_ascii:
+            regex = _ASCII_SIGNALS[idx]
+        matches = regex.findall(text)
         if matches:
             total_weight += weight
             match_str = matches[0] if isinstance(matches[0], str) else " ".join(matches[0])
             hits.append({
-                "pattern": pattern[:40],
+                "pattern": preview,
                 "weight": weight,
                 "description": description,
                 "match": match_str[:50],
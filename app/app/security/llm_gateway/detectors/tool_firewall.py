@@ -18,6 +18,8 @@ DENYLIST = {
     "exfiltrate_data", "send_external",
 }
 
+_DEFAULT_ALLOWLIST_LOWER = frozenset(t.lower() for t in DEFAULT_ALLOWLIST)
+
 
 def evaluate_tools(
     tools_requested: List[str],
@@ -27,8 +29,11 @@ def evaluate_tools(
     Evaluate requested tool calls against allow/deny lists.
     Returns per-tool decisions and overall verdict.
     """
+    # Lowercased once per call (precomputed for the default) instead of per tool
     if allowlist is None:
-        allowlist = DEFAULT_ALLOWLIST
+        allowed_names = _DEFAULT_ALLOWLIST_LOWER
+    else:
+        allowed_names = {t.lower() for t in allowlist}
 
     decisions = {}
     blocked = []
@@ -44,7 +49,7 @@ def evaluate_tools(
                 "severity": "crit",
             }
             blocked.append(tool)
-        elif tool_lower in {t.lower() for t in allowlist}:
+        elif tool_lower in allowed_names:
             decisions[tool] = {
                 "decision": "allow",
                 "reason": f"Tool '{tool}' is in the approved allowlist",
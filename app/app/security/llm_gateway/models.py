@@ -3,7 +3,7 @@ LLM Security Gateway database models.
 """
 import json
 from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, Index
 from app.app.db.database import Base
 
 
@@ -41,6 +41,12 @@ class LlmAudit(Base):
     prompt_text = Column(Text, nullable=True)                # demo mode only
     diff_json = Column(Text, nullable=True)
 
+    # /llm/audit lists newest first, optionally for one session
+    __table_args__ = (
+        Index("ix_llm_audit_ts", "ts"),
+        Index("ix_llm_audit_session_ts", "session_id", "ts"),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
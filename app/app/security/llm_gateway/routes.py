@@ -7,7 +7,7 @@ from typing import List
 
 import yaml
 from fastapi import APIRouter, Depends
-from sqlalchemy import select, desc
+from sqlalchemy import select, desc, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.app.db.database import get_db
@@ -75,17 +75,18 @@ async def list_policies(db: AsyncSession = Depends(get_db)):
 
 @llm_router.post("/policies/activate")
 async def activate_policy(body: ActivatePolicyRequest, db: AsyncSession = Depends(get_db)):
-    # Deactivate all
-    result = await db.execute(select(LlmPolicy).where(LlmPolicy.active == True))
-    for p in result.scalars().all():
-        p.active = False
-
-    # Activate target
+    # Look up the target first (unique name index) so a miss touches nothing
     result = await db.execute(select(LlmPolicy).where(LlmPolicy.name == body.policy_name))
     policy = result.scalars().first()
     if not policy:
         return {"error": f"Policy '{body.policy_name}' not found"}
 
+    # Deactivate the others in one statement, then activate target
+    await db.execute(
+        update(LlmPolicy)
+        .where(LlmPolicy.active == True, LlmPolicy.id != policy.id)
+        .values(active=False)
+    )
     policy.active = True
     await db.commit()
     return {"status": "activated", "policy": body.policy_name}
@@ -5,7 +5,7 @@ Runs injection detection → DLP scan → tool firewall → decision.
 import hashlib
 import json
 import os
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import yaml
 from sqlalchemy import select
@@ -17,10 +17,51 @@ from app.app.security.llm_gateway.detectors.dlp import detect_dlp
 from app.app.security.llm_gateway.detectors.tool_firewall import evaluate_tools
 from app.app.security.common.models import SecurityEvent
 from app.app.security.common.ws import get_broadcaster
+from app.app.services.result_cache import TTLResultCache
 
 
 POLICIES_DIR = os.path.join(os.path.dirname(__file__), "policies")
 
+# Detector output depends only on the prompt, so repeated prompts (retries, the
+# built-in test suite) skip the regex passes. The policy is still applied per call.
+# Entries hold only what _decide reads, with DLP matches already truncated, and
+# expire so matched PII isn't kept in memory indefinitely.
+_SCAN_CACHE = TTLResultCache(maxsize=4096, ttl=300.0)
+
+
+def _prompt_digest(prompt: str) -> bytes:
+    """16-byte blake2b fingerprint of a prompt (scan-cache key and audit prompt_hash)."""
+    return hashlib.blake2b(prompt.encode(), digest_size=16).digest()
+
+
+def _scan_prompt(prompt: str) -> Tuple[Dict, Dict]:
+    """(injection_result, dlp_result) for a prompt, cached by its digest.
+
+    Both results are trimmed to the fields _decide uses; each DLP hit keeps at
+    most the first 20 characters of its match.
+    """
+    key = _prompt_digest(prompt)
+    cached = _SCAN_CACHE.get(key)
+    if cached is None:
+        injection_result = detect_injection(prompt)
+        dlp_result = detect_dlp(prompt)
+        cached = (
+            {
+                "score": injection_result["score"],
+                "signals": [{"description": s["description"]} for s in injection_result["signals"]],
+            },
+            {
+                "hit_count": dlp_result["hit_count"],
+                "redacted_text": dlp_result["redacted_text"],
+                "hits": [
+                    {"type": h["type"], "original": h["original"][:20], "redacted": h["redacted"]}
+                    for h in dlp_result["hits"]
+                ],
+            },
+        )
+        _SCAN_CACHE.put(key, cached)
+    return cached
+
 
 def _load_default_policy() -> Dict:
     """Load the default YAML policy from disk."""
@@ -44,22 +85,15 @@ async def get_active_policy(db: AsyncSession) -> Dict:
     return _load_default_policy()
 
 
-async def evaluate_prompt(
-    db: AsyncSession,
-    prompt: str,
-    session_id: Optional[str] = None,
-    context: Optional[str] = None,
-    tools_requested: Optional[List[str]] = None,
-) -> Dict:
-    """Full security evaluation pipeline."""
-    policy = await get_active_policy(db)
-
+def _decide(policy: Dict, prompt: str, tools_requested: Optional[List[str]] = None) -> Dict:
+    """Apply the policy to one prompt's detector results. No I/O."""
     rules_triggered = []
     decision = "allow"
     explanation_parts = []
 
+    injection_result, dlp_result = _scan_prompt(prompt)
+
     # 1) Injection Detection
-    injection_result = detect_injection(prompt)
     injection_score = injection_result["score"]
     injection_cfg = policy.get("injection", {})
 
@@ -77,7 +111,6 @@ async def evaluate_prompt(
                 rules_triggered.append(f"  → {signal['description']}")
 
     # 2) DLP Scan
-    dlp_result = detect_dlp(prompt)
     dlp_cfg = policy.get("dlp", {})
     redacted_prompt = None
 
@@ -123,45 +156,11 @@ async def evaluate_prompt(
 
     explanation = "\n".join(explanation_parts)
 
-    # 4) Persist audit
     dlp_hits_data = [
         {"type": h["type"], "original": h["original"][:20] + "***", "redacted": h["redacted"]}
         for h in dlp_result.get("hits", [])
     ]
 
-    audit = LlmAudit(
-        session_id=session_id,
-        decision=decision,
-        injection_score=injection_score,
-        dlp_hits_json=json.dumps(dlp_hits_data),
-        rules_triggered_json=json.dumps(rules_triggered),
-        prompt_hash=hashlib.sha256(prompt.encode()).hexdigest(),
-        prompt_text=prompt,  # Demo mode: store full text
-        diff_json=json.dumps({"original": prompt, "redacted": redacted_prompt}) if redacted_prompt else None,
-    )
-    db.add(audit)
-
-    # 5) Security event (for non-allow decisions)
-    if decision != "allow":
-        severity = "crit" if decision == "block" else "med"
-        event = SecurityEvent(
-            type="llm_gateway",
-            severity=severity,
-            title=f"{'🚫 Blocked' if decision == 'block' else '✏️ Redacted'}: LLM Request",
-            summary=explanation,
-            payload_json=json.dumps({
-                "decision": decision,
-                "injection_score": injection_score,
-                "dlp_hits": len(dlp_result.get("hits", [])),
-                "session_id": session_id,
-            }),
-        )
-        db.add(event)
-        await db.flush()
-        await get_broadcaster().broadcast(event.to_dict())
-
-    await db.commit()
-
     return {
         "decision": decision,
         "injection_score": injection_score,
@@ -173,6 +172,84 @@ async def evaluate_prompt(
     }
 
 
+async def _persist(db: AsyncSession, evaluated: List[Tuple[str, Optional[str], Dict]]) -> None:
+    """Write audit rows (and events for non-allow decisions) for evaluated
+    ``(prompt, session_id, result)`` triples, then commit once."""
+    audits = []
+    events = []
+    for prompt, session_id, result in evaluated:
+        decision = result["decision"]
+        redacted_prompt = result["redacted_prompt"]
+
+        # 4) Persist audit
+        audit = LlmAudit(
+            session_id=session_id,
+            decision=decision,
+            injection_score=result["injection_score"],
+            dlp_hits_json=json.dumps(result["dlp_hits"]),
+            rules_triggered_json=json.dumps(result["rules_triggered"]),
+            prompt_hash=_prompt_digest(prompt).hex(),
+            prompt_text=prompt,  # Demo mode: store full text
+            diff_json=json.dumps({"original": prompt, "redacted": redacted_prompt}) if redacted_prompt else None,
+        )
+        audits.append(audit)
+
+        # 5) Security event (for non-allow decisions)
+        if decision != "allow":
+            severity = "crit" if decision == "block" else "med"
+            event = SecurityEvent(
+                type="llm_gateway",
+                severity=severity,
+                title=f"{'🚫 Blocked' if decision == 'block' else '✏️ Redacted'}: LLM Request",
+                summary=result["explanation"],
+                payload_json=json.dumps({
+                    "decision": decision,
+                    "injection_score": result["injection_score"],
+                    "dlp_hits": len(result["dlp_hits"]),
+                    "session_id": session_id,
+                }),
+            )
+            events.append(event)
+
+    # One add per table; the flush below emits a batched INSERT for each
+    db.add_all(audits)
+    db.add_all(events)
+
+    if events:
+        await db.flush()
+        broadcaster = get_broadcaster()
+        for event in events:
+            await broadcaster.broadcast(event.to_dict())
+
+    await db.commit()
+
+
+async def evaluate_prompt(
+    db: AsyncSession,
+    prompt: str,
+    session_id: Optional[str] = None,
+    context: Optional[str] = None,
+    tools_requested: Optional[List[str]] = None,
+) -> Dict:
+    """Full security evaluation pipeline."""
+    policy = await get_active_policy(db)
+    result = _decide(policy, prompt, tools_requested)
+    await _persist(db, [(prompt, session_id, result)])
+    return result
+
+
+async def evaluate_many(
+    db: AsyncSession,
+    prompts: List[str],
+    session_id: Optional[str] = None,
+) -> List[Dict]:
+    """Evaluate a batch of prompts against one policy read, with a single commit."""
+    policy = await get_active_policy(db)
+    results = [_decide(policy, prompt) for prompt in prompts]
+    await _persist(db, [(prompt, session_id, result) for prompt, result in zip(prompts, results)])
+    return results
+
+
 # ── Built-in test suite ──────────────────────────
 TEST_CASES = [
     {"name": "Clean prompt", "prompt": "What is the weather today?", "expected_decision": "allow"},
@@ -195,8 +272,8 @@ async def run_test_suite(db: AsyncSession) -> Dict:
     results = []
     passed = 0
 
-    for tc in TEST_CASES:
-        eval_result = await evaluate_prompt(db, tc["prompt"], session_id="test-suite")
+    eval_results = await evaluate_many(db, [tc["prompt"] for tc in TEST_CASES], session_id="test-suite")
+    for tc, eval_result in zip(TEST_CASES, eval_results):
         actual = eval_result["decision"]
         is_pass = actual == tc["expected_decision"]
         if is_pass:
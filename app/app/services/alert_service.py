@@ -2,12 +2,19 @@
 Alert service for sending notifications about PPE violations.
 Supports Slack webhooks for real-time alerting.
 """
+import asyncio
 import os
-import json
-import requests
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Set
 import logging
 
+import httpx
+
+try:
+    import h2  # noqa: F401  (pulled in by httpx[http2])
+    HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover - optional dependency
+    HTTP2_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,11 +30,38 @@ class AlertService:
         """
         self.webhook_url = webhook_url or os.getenv("SLACK_WEBHOOK_URL")
         self.enabled = bool(self.webhook_url)
+        # Pooled client: keeps the TCP/TLS connection to Slack alive between alerts.
+        # HTTP/2 multiplexes bursts of batch alerts over that single connection.
+        self._client: Optional[httpx.AsyncClient] = (
+            httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=5.0,
+                limits=httpx.Limits(max_keepalive_connections=4),
+                headers={"Content-Type": "application/json"},
+            )
+            if self.enabled
+            else None
+        )
+        # Strong refs to fire-and-forget sends so they aren't garbage collected
+        self._pending: Set[asyncio.Task] = set()
         
         if not self.enabled:
             logger.info("Slack webhook not configured. Alerts will be logged only.")
     
-    def send_alert(self, violation_type: str, details: Dict[str, Any]) -> bool:
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client (called on app shutdown)."""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+    
+    def send_alert_nowait(self, violation_type: str, details: Dict[str, Any]) -> None:
+        """Schedule `send_alert` on the running loop without waiting for Slack."""
+        task = asyncio.create_task(self.send_alert(violation_type, details))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+    
+    async def send_alert(self, violation_type: str, details: Dict[str, Any]) -> bool:
         """
         Send alert about a PPE violation.
         
@@ -79,12 +113,7 @@ class AlertService:
         # Send to Slack if webhook is configured
         if self.enabled:
             try:
-                response = requests.post(
-                    self.webhook_url,
-                    json=message,
-                    headers={"Content-Type": "application/json"},
-                    timeout=5
-                )
+                response = await self._client.post(self.webhook_url, json=message)
                 
                 if response.status_code == 200:
                     logger.info(f"Slack alert sent successfully for {violation_type}")
@@ -99,7 +128,7 @@ class AlertService:
         
         return True  # Return True for local logging even if Slack is disabled
     
-    def send_batch_alert(self, violations: list) -> bool:
+    async def send_batch_alert(self, violations: list) -> bool:
         """
         Send a batch alert for multiple violations.
         
@@ -143,12 +172,7 @@ class AlertService:
         
         if self.enabled:
             try:
-                response = requests.post(
-                    self.webhook_url,
-                    json=message,
-                    headers={"Content-Type": "application/json"},
-                    timeout=5
-                )
+                response = await self._client.post(self.webhook_url, json=message)
                 return response.status_code == 200
             except Exception as e:
                 logger.error(f"Error sending batch Slack alert: {e}")
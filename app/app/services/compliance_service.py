@@ -9,6 +9,11 @@ from app.app.db.models import Violation, Incident
 
 
 class ComplianceService:
+    # Class names emitted by the PPE models for a missing helmet / vest
+    NO_HELMET = frozenset({'no-helmet', 'NO-Hardhat', 'without_helmet'})
+    NO_VEST = frozenset({'no-vest', 'NO-Safety Vest', 'without_vest'})
+    NONCOMPLIANT = NO_HELMET | NO_VEST
+
     def __init__(self):
         # Stores the timestamp when a violation type was LAST seen by the camera
         self.last_seen_timestamps = {} 
@@ -24,21 +29,34 @@ class ComplianceService:
         Analyzes detections to find non-compliant workers.
         Returns a list of violation dictionaries.
         """
+        # Empty scenes are the common case on a surveillance stream
+        if not detections:
+            return []
+        return self._violations((det['class_name'], det['box'], det['confidence']) for det in detections)
+
+    def check_detections(self, dets) -> List[Dict[str, Any]]:
+        """`check_compliance` for array-backed `model_service.Detections`:
+        only the flagged boxes are converted to Python lists."""
+        if not len(dets):
+            return []
+        return self._violations(
+            (name, dets.boxes[i].tolist(), float(dets.confs[i]))
+            for i, name in enumerate(dets.class_names) if name in self.NONCOMPLIANT
+        )
+
+    def _violations(self, rows) -> List[Dict[str, Any]]:
+        """Violation dicts for (class_name, box, confidence) rows."""
         violations = []
         
-        for det in detections:
-            name = det['class_name']
-            box = det['box']
-            conf = det['confidence']
-            
-            if name in ['no-helmet', 'NO-Hardhat', 'without_helmet']:
+        for name, box, conf in rows:
+            if name in self.NO_HELMET:
                 violations.append({
                     "violation_type": "NO_HELMET",
                     "severity": "HIGH",
                     "details": {"box": box, "confidence": conf}
                 })
             
-            if name in ['no-vest', 'NO-Safety Vest', 'without_vest']:
+            if name in self.NO_VEST:
                 violations.append({
                     "violation_type": "NO_VEST",
                     "severity": "MEDIUM",
@@ -0,0 +1,107 @@
+"""
+GPU-side frame decoding and preprocessing for YOLO inference.
+
+JPEG frames are decoded with nvJPEG (torchvision.io.decode_jpeg on CUDA) and
+letterboxed into a normalized (B,3,S,S) tensor that Ultralytics accepts as-is,
+so the CPU never touches the raw RGB pixels and only the compressed bytes cross
+PCIe. Frames that are not JPEG (or hosts without torchvision) can still be
+resized/normalized on the GPU with `letterbox_arrays`; callers fall back to
+Ultralytics' own CPU preprocessing when both return None.
+"""
+from __future__ import annotations
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from ultralytics.engine.results import Boxes
+
+try:
+    from torchvision.io import ImageReadMode, decode_jpeg
+except Exception:  # pragma: no cover - optional dependency
+    decode_jpeg = None
+
+# Ultralytics' letterbox padding colour
+PAD_VALUE = 114 / 255.0
+
+
+def gpu_decode_available(device: str) -> bool:
+    return decode_jpeg is not None and device != "cpu" and torch.cuda.is_available()
+
+
+def gpu_preprocess_available(device: str) -> bool:
+    return device != "cpu" and torch.cuda.is_available()
+
+
+def _letterbox_into(batch: torch.Tensor, i: int, img: torch.Tensor) -> Tuple[float, Tuple[int, int]]:
+    """Resize a (3,H,W) uint8 CUDA image so its long side fits the batch and
+    write it, normalized to 0-1, into the top-left of slot `i`."""
+    imgsz = batch.shape[-1]
+    h, w = img.shape[1:]
+    r = imgsz / max(h, w)
+    nh, nw = max(1, round(h * r)), max(1, round(w * r))
+    resized = F.interpolate(img[None].float(), size=(nh, nw), mode="bilinear", align_corners=False)
+    batch[i, :, :nh, :nw] = resized[0].div_(255.0)
+    return r, (h, w)
+
+
+def letterbox_jpegs(
+    blobs: Sequence[bytes], device: str, imgsz: int = 640
+) -> Optional[Tuple[torch.Tensor, List[float], List[Tuple[int, int]]]]:
+    """Decode JPEG bytes on `device` and pack them into one letterboxed batch.
+
+    Each frame is resized so its long side is `imgsz` and padded bottom/right,
+    so a box maps back to the original frame by dividing by its ratio.
+    Returns (batch, ratios, orig_shapes) or None if any frame can't be decoded
+    on the GPU (e.g. not a JPEG).
+    """
+    if not gpu_decode_available(device):
+        return None
+    try:
+        batch = torch.full((len(blobs), 3, imgsz, imgsz), PAD_VALUE, device=device)
+        ratios: List[float] = []
+        shapes: List[Tuple[int, int]] = []
+        for i, blob in enumerate(blobs):
+            data = torch.frombuffer(bytearray(blob), dtype=torch.uint8)
+            img = decode_jpeg(data, mode=ImageReadMode.RGB, device=device)  # (3,H,W) uint8
+            r, shape = _letterbox_into(batch, i, img)
+            ratios.append(r)
+            shapes.append(shape)
+        return batch, ratios, shapes
+    except Exception:
+        return None
+
+
+def letterbox_arrays(
+    images: Sequence[np.ndarray], device: str, imgsz: int = 640
+) -> Optional[Tuple[torch.Tensor, List[float], List[Tuple[int, int]]]]:
+    """Same as `letterbox_jpegs` for already-decoded RGB (H,W,3) uint8 arrays:
+    the raw frame is uploaded once and resized/normalized on the GPU instead of
+    Ultralytics' CPU LetterBox."""
+    if not gpu_preprocess_available(device):
+        return None
+    try:
+        batch = torch.full((len(images), 3, imgsz, imgsz), PAD_VALUE, device=device)
+        ratios: List[float] = []
+        shapes: List[Tuple[int, int]] = []
+        for i, image in enumerate(images):
+            # Pinned staging buffer so the upload is a real async DMA
+            host = torch.from_numpy(np.ascontiguousarray(image)).pin_memory()
+            img = host.to(device, non_blocking=True).permute(2, 0, 1)
+            r, shape = _letterbox_into(batch, i, img)
+            ratios.append(r)
+            shapes.append(shape)
+        return batch, ratios, shapes
+    except Exception:
+        return None
+
+
+def rescale_boxes(boxes, ratio: float, orig_shape: Tuple[int, int]):
+    """Map Ultralytics `Boxes` from letterboxed input coords to the original frame."""
+    h, w = orig_shape
+    data = boxes.data.clone()
+    data[:, :4] /= ratio
+    data[:, 0:4:2].clamp_(0, w)
+    data[:, 1:4:2].clamp_(0, h)
+    return Boxes(data, orig_shape)
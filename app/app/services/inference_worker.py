@@ -0,0 +1,149 @@
+"""
+Dedicated inference thread + CUDA graph replay for the YOLO forward pass.
+
+All GPU work for a model is funneled through one `InferenceWorker` thread, so
+forward passes never contend on CUDA (the WebSocket routes already hand the
+analyzers to run_in_executor, so the event loop is never blocked).
+On CUDA, `CudaGraphForward` captures the raw network forward once per input
+shape and replays it afterwards, removing the per-kernel launch overhead that
+dominates batch-1 latency.
+`MicroBatcher` gathers single-frame requests into batched forward passes:
+either those arriving within a few milliseconds of each other, or
+(continuous batching) whatever queued up while the previous pass ran.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import torch
+
+
+class CudaGraphForward:
+    """Replay `net(x)` from a CUDA graph captured per input shape.
+
+    Input must already be on the GPU with a fixed shape (e.g. a letterboxed
+    (B,3,640,640) batch); the returned tensor is the graph's static output and
+    is overwritten by the next replay, so consume it before calling again.
+    """
+
+    def __init__(self, net: torch.nn.Module, warmup_iters: int = 2):
+        self.net = net
+        self.warmup_iters = warmup_iters
+        self._graphs: Dict[Tuple[int, ...], Tuple[torch.cuda.CUDAGraph, torch.Tensor, torch.Tensor]] = {}
+
+    @torch.inference_mode()
+    def _forward(self, x: torch.Tensor) -> torch.Tensor:
+        out = self.net(x)
+        # Detect head returns (preds, features) outside export mode
+        return out[0] if isinstance(out, (tuple, list)) else out
+
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        key = tuple(x.shape)
+        entry = self._graphs.get(key)
+        if entry is None:
+            static_in = x.clone()
+            # Warm up on a side stream so cuDNN autotuning isn't captured
+            stream = torch.cuda.Stream()
+            stream.wait_stream(torch.cuda.current_stream())
+            with torch.cuda.stream(stream):
+                for _ in range(self.warmup_iters):
+                    self._forward(static_in)
+            torch.cuda.current_stream().wait_stream(stream)
+
+            graph = torch.cuda.CUDAGraph()
+            with torch.cuda.graph(graph):
+                static_out = self._forward(static_in)
+            entry = self._graphs[key] = (graph, static_in, static_out)
+
+        graph, static_in, static_out = entry
+        static_in.copy_(x)
+        graph.replay()
+        return static_out
+
+
+class InferenceWorker:
+    """Single dedicated thread that owns a model's GPU work."""
+
+    def __init__(self, name: str = "yolo-infer"):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+
+    def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run `fn(*args)` on the inference thread and wait for the result."""
+        return self._executor.submit(fn, *args).result()
+
+
+class BatcherSaturated(RuntimeError):
+    """The batcher's input queue is full; the item was dropped."""
+
+
+class MicroBatcher:
+    """Collect items submitted within `max_wait_ms` of the first one (up to
+    `max_batch`) and run them through `batch_fn` in a single call on a
+    dedicated thread. `batch_fn(items)` must return one result per item.
+
+    With `max_wait_ms=0` the batcher never waits: each pass takes whatever
+    was queued while the previous one ran (continuous batching). At most
+    `max_queue` items wait at a time; `submit` drops anything beyond that
+    with `BatcherSaturated` so a backlog can't build up latency.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], Sequence[Any]],
+        max_batch: int = 8,
+        max_wait_ms: float = 5.0,
+        max_queue: int = 0,
+        name: str = "yolo-batch",
+    ):
+        self._batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue[Tuple[Any, Future]]" = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._loop, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item: Any, block: bool = False) -> Future:
+        """Queue `item`; the future resolves to its entry of the batch result.
+
+        `block=True` waits for queue space instead of dropping the item.
+        """
+        future: Future = Future()
+        try:
+            self._queue.put((item, future), block=block)
+        except queue.Full:
+            raise BatcherSaturated("inference queue full, frame dropped") from None
+        return future
+
+    def _collect(self) -> List[Tuple[Any, Future]]:
+        pending = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(pending) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    pending.append(self._queue.get(timeout=remaining))
+                else:
+                    # Past the deadline (or continuous mode): only take what's already queued
+                    pending.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        # Drop callers that gave up while waiting
+        return [(item, future) for item, future in pending if future.set_running_or_notify_cancel()]
+
+    def _loop(self) -> None:
+        while True:
+            pending = self._collect()
+            if not pending:
+                continue
+            try:
+                results = self._batch_fn([item for item, _ in pending])
+            except Exception as exc:
+                for _, future in pending:
+                    future.set_exception(exc)
+                continue
+            for (_, future), result in zip(pending, results):
+                future.set_result(result)
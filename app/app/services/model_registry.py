@@ -8,6 +8,8 @@ _model_instance: Optional[YOLOModel] = None
 
 
 def get_yolo_model() -> YOLOModel:
+    # Lock-free once built; the lock only serializes the first construction, so
+    # concurrent first callers can't each start a batcher and load the weights
     global _model_instance
     if _model_instance is None:
         with _model_lock:
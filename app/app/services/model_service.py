@@ -1,14 +1,82 @@
-from ultralytics import YOLO
 from PIL import Image
+import asyncio
 import io
 import cv2
 import numpy as np
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
 import os
 import tempfile
 import torch
 
+from app.app.services.gpu_preprocess import (
+    gpu_decode_available,
+    letterbox_arrays,
+    letterbox_jpegs,
+    rescale_boxes,
+)
+from app.app.services.inference_worker import MicroBatcher
+from app.app.services.yolo_engine import load_yolo_detector
+
+
+def _boxes_to_numpy(boxes):
+    """Copy a Results.boxes tensor set to host memory in one go.
+
+    Returns (xyxy[N,4], conf[N], cls[N] as int) numpy arrays.
+    """
+    if boxes is None or len(boxes) == 0:
+        return np.empty((0, 4), dtype=np.float32), np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+    # FP16 inference returns half tensors; hand out float32 either way
+    xyxy = boxes.xyxy.cpu().numpy().astype(np.float32, copy=False)
+    conf = boxes.conf.cpu().numpy().astype(np.float32, copy=False)
+    cls = boxes.cls.cpu().numpy().astype(np.int64)
+    return xyxy, conf, cls
+
+
+@dataclass
+class Detections:
+    """One frame's detections as parallel arrays (struct-of-arrays).
+
+    Boxes stay a single (N,4) float32 array through scaling and compliance;
+    `to_list()` builds the per-box dicts only at the API/DB boundary.
+    """
+    boxes: np.ndarray  # (N,4) xyxy float32
+    confs: np.ndarray  # (N,) float32
+    class_ids: np.ndarray  # (N,) int64
+    class_names: List[str]
+
+    def __len__(self) -> int:
+        return len(self.class_names)
+
+    def scaled(self, scale_x: float, scale_y: float) -> "Detections":
+        """Copy with boxes multiplied by (scale_x, scale_y) in one array op."""
+        factors = np.array([scale_x, scale_y, scale_x, scale_y], dtype=np.float32)
+        return Detections(self.boxes * factors, self.confs, self.class_ids, self.class_names)
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "box": box,
+                "confidence": confidence,
+                "class_id": class_id,
+                "class_name": class_name
+            }
+            for box, confidence, class_id, class_name in zip(
+                self.boxes.tolist(), self.confs.tolist(), self.class_ids.tolist(), self.class_names
+            )
+        ]
+
+
+def _decode_image(image_bytes: bytes) -> Image.Image:
+    """Fully decode an encoded frame to RGB (PIL's open() alone is lazy)."""
+    return Image.open(io.BytesIO(image_bytes)).convert("RGB")
+
+
 class YOLOModel:
+    # Largest micro-batch; also the max batch baked into a TensorRT engine
+    MAX_BATCH = 8
+
     def __init__(self, model_path: str = "yolov8n_ppe_6classes.pt"):
         # Get project root directory (go up from app/app/services/ to project root)
         project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
@@ -23,12 +91,13 @@ class YOLOModel:
         print(f"DEBUG: Project root = {project_root}")
         print(f"DEBUG: Model paths to try: {model_paths_to_try}")
         
-        # Try each model path
+        # Try each model path (with YOLO_TENSORRT set, the .pt is exported once
+        # to a TensorRT engine next to it and the engine is served instead)
         self.model = None
         for path in model_paths_to_try:
             if os.path.exists(path):
                 try:
-                    self.model = YOLO(path)
+                    self.model, self.device = load_yolo_detector(path, imgsz=640, batch=self.MAX_BATCH)
                     print(f"✅ Model loaded successfully: {path}")
                     break
                 except Exception as e:
@@ -40,47 +109,120 @@ class YOLOModel:
         if self.model is None:
             raise RuntimeError(f"Could not load YOLO model from any path: {model_paths_to_try}")
 
+        # Class ids whose name marks a missing PPE item ("NO-Hardhat", "NO_Mask"...),
+        # resolved once here so the per-detection loop is a set lookup
+        self._noncompliant_class_ids = {
+            cls_id for cls_id, name in self.model.names.items()
+            if name.upper().startswith(("NO-", "NO_"))
+        }
+
+        # TensorRT engines are built for 640x640 inputs only
+        self.dynamic_imgsz = isinstance(self.model.model, torch.nn.Module)
+
         # GPU Check
-        if torch.cuda.is_available():
-            self.device = 'cuda:0'
+        if self.device != 'cpu':
             print("\n" + "="*50)
             print(f"🚀  GPU DETECTED: {torch.cuda.get_device_name(0)}")
             print("🚀  Accelerating inference with NVIDIA CUDA")
             print("="*50 + "\n", flush=True)
-            self.model.to(self.device)
         else:
-            self.device = 'cpu'
             print("\n" + "="*50)
             print("⚠️  NO GPU DETECTED - Running in CPU Mode (Slower)")
             print("⚠️  To enable GPU, ensure NVIDIA Drivers + Docker GPU support are installed.")
             print("="*50 + "\n", flush=True)
+
+        # CPU-side JPEG/PNG decode runs in this pool so it overlaps with the
+        # forward pass on the batch thread. Skipped when nvJPEG decodes on the GPU.
+        self._gpu_decode = gpu_decode_available(self.device)
+        self._decode_pool = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="ppe-decode")
+
+        # Continuous batching: frames from HTTP /detect and the PPE WebSocket
+        # that queue up while a forward pass runs all go into the next one.
+        # Beyond 32 waiting frames new ones are dropped (BatcherSaturated).
+        self._batcher = MicroBatcher(
+            self._predict_batch, max_batch=self.MAX_BATCH, max_wait_ms=0, max_queue=32, name="ppe-batch"
+        )
+
+        self.warmup()
+
+    def warmup(self, batch_sizes=tuple(range(1, MAX_BATCH + 1))) -> None:
+        """Push black frames through the batched path at every batch size the
+        batcher can produce (1..MAX_BATCH), so lazy CUDA module loading and
+        cuDNN autotuning (benchmark mode tunes per input shape) happen before
+        the first request. CPU hosts were already warmed up by the loader."""
+        if self.device == 'cpu':
+            return
+        buf = io.BytesIO()
+        Image.new("RGB", (640, 640)).save(buf, format="JPEG")
+        frame = (buf.getvalue(), None)
+        for batch_size in sorted(set(batch_sizes)):
+            try:
+                self._predict_batch([frame] * batch_size)
+            except Exception as e:
+                print(f"⚠️ PPE model warmup failed at batch {batch_size}: {e}", flush=True)
+                return
+
     def predict(self, image_bytes: bytes) -> List[Dict[str, Any]]:
+        return self.detect(image_bytes).to_list()
+
+    async def predict_async(self, image_bytes: bytes) -> List[Dict[str, Any]]:
+        """`predict` for the event loop: awaits the batch without holding a threadpool worker."""
+        return (await self.detect_async(image_bytes)).to_list()
+
+    def detect(self, image_bytes: bytes) -> Detections:
+        """Like `predict`, but returns the array-backed `Detections`."""
         if not self.model:
             raise RuntimeError("Model not loaded")
-            
-        image = Image.open(io.BytesIO(image_bytes))
+        # Sync callers are already off the event loop: decode in their own thread.
+        # They are batch jobs, so they wait for queue space instead of dropping frames.
+        image = None if self._gpu_decode else _decode_image(image_bytes)
+        return self._batcher.submit((image_bytes, image), block=True).result()
+
+    async def detect_async(self, image_bytes: bytes) -> Detections:
+        if not self.model:
+            raise RuntimeError("Model not loaded")
+        image = None
+        if not self._gpu_decode:
+            loop = asyncio.get_running_loop()
+            image = await loop.run_in_executor(self._decode_pool, _decode_image, image_bytes)
+        return await asyncio.wrap_future(self._batcher.submit((image_bytes, image)))
+
+    def _predict_batch(self, frames: List[Tuple[bytes, Optional[Image.Image]]]) -> List[Detections]:
+        """One forward pass over several frames; one `Detections` per frame.
+
+        Each frame is (encoded bytes, decoded RGB image or None if the GPU decodes it).
+        """
+        blobs = [image_bytes for image_bytes, _ in frames]
         
         # Use full resolution for best quality - RTX 2070 can handle 640 easily
-        results = self.model(image, conf=0.20, device=self.device, verbose=False, imgsz=640)
+        # On GPU, decode/letterbox/normalize happen on the device and the
+        # (B,3,640,640) tensor is fed to YOLO directly, skipping Ultralytics' CPU LetterBox
+        gpu_batch = letterbox_jpegs(blobs, self.device, 640) if self._gpu_decode else None
+        if gpu_batch is None:
+            # Not decodable by nvJPEG (e.g. PNG): decode here as a fallback
+            images = [image if image is not None else _decode_image(image_bytes) for image_bytes, image in frames]
+            gpu_batch = letterbox_arrays([np.asarray(image) for image in images], self.device, 640)
+        # No autograd bookkeeping; FP16 tensor-core kernels on CUDA
+        with torch.inference_mode(), torch.autocast("cuda", dtype=torch.float16, enabled=self.device != 'cpu'):
+            if gpu_batch is not None:
+                batch, ratios, shapes = gpu_batch
+                results = self.model(batch, conf=0.20, device=self.device, verbose=False, half=True)
+                boxes_per_result = [
+                    rescale_boxes(r.boxes, ratio, shape) for r, ratio, shape in zip(results, ratios, shapes)
+                ]
+            else:
+                results = self.model(images, conf=0.20, device=self.device, verbose=False, imgsz=640)
+                boxes_per_result = [r.boxes for r in results]
         
-        detections = []
-        for result in results:
-            boxes = result.boxes
-            for box in boxes:
-                x1, y1, x2, y2 = box.xyxy[0].tolist()
-                confidence = box.conf[0].item()
-                class_id = int(box.cls[0].item())
-                class_name = result.names[class_id]
-                
-                detections.append({
-                    "box": [x1, y1, x2, y2],
-                    "confidence": confidence,
-                    "class_id": class_id,
-                    "class_name": class_name
-                })
+        batch_detections = []
+        for result, boxes in zip(results, boxes_per_result):
+            # One device->host transfer per result instead of 3 syncs per box
+            xyxy, confs, class_ids = _boxes_to_numpy(boxes)
+            class_names = [result.names[class_id] for class_id in class_ids.tolist()]
+            batch_detections.append(Detections(xyxy, confs, class_ids, class_names))
         
-        print(f"DEBUG_MODEL: Found {len(detections)} detections", flush=True)
-        return detections
+        print(f"DEBUG_MODEL: Batch of {len(blobs)}, detections {[len(d) for d in batch_detections]}", flush=True)
+        return batch_detections
 
     def predict_video_from_file(self, input_path: str, frame_skip: int = 5) -> Dict[str, Any]:
         """Process video and return detections metadata ONLY (no video generation for speed)"""
@@ -117,31 +259,23 @@ class YOLOModel:
                     
                     # Inference
                     # Optimization: imgsz=320 is MUCH faster on CPU and usually sufficient for PPE
-                    results = self.model(frame, verbose=False, imgsz=320)
+                    results = self.model(frame, verbose=False, imgsz=320 if self.dynamic_imgsz else 640)
                     
                     frame_detections = []
+                    scale = np.array([original_w, original_h, original_w, original_h], dtype=np.float32)
                     for result in results:
-                        for box in result.boxes:
-                            # Get absolute coordinates relative to the processed frame
-                            x1, y1, x2, y2 = box.xyxy[0].tolist()
-                            conf = float(box.conf[0].item())
-                            cls_id = int(box.cls[0].item())
+                        xyxy, confs, class_ids = _boxes_to_numpy(result.boxes)
+                        # Normalize coordinates (0 to 1) so frontend can render regardless of video size
+                        norm_boxes = xyxy / scale
+                        for norm_box, conf, cls_id in zip(norm_boxes.tolist(), confs.tolist(), class_ids.tolist()):
                             cls_name = result.names[cls_id]
                             
-                            # Normalize coordinates (0 to 1) so frontend can render regardless of video size
-                            norm_box = [
-                                x1 / original_w,
-                                y1 / original_h,
-                                x2 / original_w,
-                                y2 / original_h
-                            ]
-                            
                             frame_detections.append({
                                 "box": norm_box,
                                 "confidence": conf,
                                 "class_id": cls_id,
                                 "class_name": cls_name,
-                                "is_compliant": not (cls_name.upper().startswith("NO-") or cls_name.upper().startswith("NO_"))
+                                "is_compliant": cls_id not in self._noncompliant_class_ids
                             })
                     
                     all_detections.append({
@@ -1,38 +1,53 @@
 from __future__ import annotations
 
 import threading
-from typing import List, Optional
+from typing import Dict, List, Optional
 from ultralytics import YOLO
 
+# Shared per weights file, so the ADAS and DMS detectors reuse one model
+_models: Dict[str, YOLO] = {}
+_load_lock = threading.Lock()
+
+
+def _load_yolo(model_path: str) -> YOLO:
+    # Lock-free once loaded; the lock only keeps concurrent first calls from
+    # loading the weights twice
+    model = _models.get(model_path)
+    if model is None:
+        with _load_lock:
+            model = _models.get(model_path)
+            if model is None:
+                model = _models[model_path] = YOLO(model_path)
+    return model
+
 
 class GeneralObjectDetector:
     def __init__(self, model_path: str = "yolov8n.pt") -> None:
         self.model_path = model_path
-        self._model = None
-        self._lock = threading.Lock()
 
-    def _ensure_model(self):
-        if self._model is None:
-            with self._lock:
-                if self._model is None:
-                    self._model = YOLO(self.model_path)
+    @property
+    def _model(self) -> YOLO:
+        return _load_yolo(self.model_path)
 
     def predict(self, frame, conf: float = 0.3, classes: Optional[List[int]] = None) -> List[dict]:
-        self._ensure_model()
         results = self._model(frame, conf=conf, imgsz=640, verbose=False, classes=classes)
         detections = []
         for result in results:
             names = result.names
-            for box in result.boxes:
-                x1, y1, x2, y2 = box.xyxy[0].tolist()
-                confidence = float(box.conf[0].item())
-                class_id = int(box.cls[0].item())
+            boxes = result.boxes
+            if boxes is None or len(boxes) == 0:
+                continue
+            # Bulk device->host copy: one sync per tensor instead of 3 per box
+            xyxy = boxes.xyxy.cpu().numpy().tolist()
+            confs = boxes.conf.cpu().numpy().tolist()
+            class_ids = boxes.cls.cpu().numpy().astype(int).tolist()
+            for box, confidence, class_id in zip(xyxy, confs, class_ids):
                 detections.append(
                     {
                         "class_id": class_id,
                         "class_name": names[class_id],
                         "confidence": confidence,
-                        "box": [x1, y1, x2, y2],
+                        "box": box,
                     }
                 )
         return detections
@@ -0,0 +1,65 @@
+"""
+Content-addressed cache for per-frame analysis results.
+
+Cameras regularly post the exact same JPEG twice (retransmits, debounce), and
+one frame can drive several analyzers. Results are keyed by a digest of the
+raw image bytes, so an identical frame skips the whole YOLO pass. The same
+digest is stored in `Detection.image_hash`.
+"""
+from __future__ import annotations
+
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+try:
+    import xxhash
+except ImportError:  # pragma: no cover - optional dependency
+    xxhash = None
+
+
+def image_digest(image_bytes: bytes) -> str:
+    """Hex digest of the image bytes (xxh3-64, or blake2b-64 without xxhash)."""
+    if xxhash is not None:
+        return xxhash.xxh3_64_hexdigest(image_bytes)
+    return hashlib.blake2b(image_bytes, digest_size=8).hexdigest()
+
+
+class TTLResultCache:
+    """Thread-safe LRU with a per-entry time-to-live.
+
+    Cached values are shared between callers and must be treated as read-only,
+    unless `isolate` is set: then `put` stores a deep copy and every `get`
+    returns a fresh one, so callers can mutate what they get back.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: float = 2.0, isolate: bool = False):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.isolate = isolate
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return copy.deepcopy(value) if self.isolate else value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.isolate:
+            value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
@@ -5,15 +5,50 @@ Handles front and rear camera analysis for safe driving features:
 - Rear: approaching vehicles, distance estimation
 Uses YOLOv8n pretrained on COCO (no additional training needed)
 """
-from typing import List, Dict, Any, Tuple
-from ultralytics import YOLO
+from collections import deque, namedtuple
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
 from PIL import Image
 import io
-import threading
+import logging
+import math
 import torch
 import numpy as np
 import cv2
 
+from app.app.services.result_cache import TTLResultCache, image_digest
+from app.app.services.yolo_backbone import (
+    AdaptiveResolution,
+    SharedYoloBackbone,
+    boxes_to_numpy,
+    get_shared_yolo,
+)
+
+logger = logging.getLogger(__name__)
+
+# Detections kept as parallel arrays (struct-of-arrays) through the rules;
+# dicts are only built for the API response and for the alerts that fire
+_DetBatch = namedtuple("_DetBatch", "cls conf x1 y1 x2 y2 distance")
+
+
+@dataclass(frozen=True)
+class AlertRule:
+    """Per-class distance alert: fires below `warning` m, at "danger" level below `danger` m."""
+    type: str
+    message: str  # `{d}` is replaced by the distance
+    warning: float = math.inf
+    danger: float = -math.inf
+    risk: Optional[str] = None  # risk_level set when the rule fires
+
+    def emit(self, distance: float, results: Dict[str, Any]) -> None:
+        results["alerts"].append({
+            "type": self.type,
+            "level": "danger" if distance < self.danger else "warning",
+            "message": self.message.format(d=distance), "distance": distance,
+        })
+        if self.risk is not None:
+            results["risk_level"] = self.risk
+
 
 class RoadSafetyModel:
     # COCO classes relevant to road safety
@@ -30,35 +65,47 @@ class RoadSafetyModel:
     
     # High priority classes (trigger immediate alerts)
     HIGH_PRIORITY = {"person", "bicycle", "motorcycle", "stop_sign"}
+
+    # Front-camera distance alerts by class id (traffic lights are handled
+    # separately: they need the color crop)
+    FRONT_RULES = {
+        0: AlertRule("PEDESTRIAN", "¡Peatón a {d}m!", warning=15, danger=8, risk="high"),
+        1: AlertRule("CYCLIST", "Ciclista a {d}m"),
+        11: AlertRule("SIGN", "Señal de STOP"),
+    }
+    TRAFFIC_LIGHT_ID = 9
+
+    # Dense class-id LUT size (COCO ids fit in 91 slots)
+    NUM_CLASS_IDS = 91
     
-    def __init__(self):
-        try:
-            self.model = YOLO("yolov8n.pt")
-            print("✅ Road Safety model loaded: yolov8n.pt (COCO)")
-        except Exception as e:
-            print(f"⚠️ Road Safety model not found: {e}")
-            self.model = None
+    def __init__(self, backbone: SharedYoloBackbone | None = None):
+        # yolov8n is shared with VehicleControlModel (one copy of the weights
+        # on the GPU, and same-frame results are reused from its cache)
+        self.backbone = backbone or get_shared_yolo()
+        self.model = self.backbone.model
+        self.device = self.backbone.device
         
-        # GPU Check
-        if torch.cuda.is_available():
-            self.device = 'cuda:0'
-            if self.model is not None:
-                self.model.to(self.device)   # keep weights warm on the GPU
-            print(f"🚀 Road Safety using GPU: {torch.cuda.get_device_name(0)}")
+        if self.device != 'cpu':
+            logger.info("🚀 Road Safety using GPU: %s", torch.cuda.get_device_name(0))
         else:
-            self.device = 'cpu'
-            print("⚠️ Road Safety using CPU (slower)")
+            logger.warning("⚠️ Road Safety using CPU (slower)")
+
+        # Identical frames (retransmits) within 2s reuse the previous result.
+        # Hits get their own copy, so callers may mutate it. A hit is the same
+        # moment re-sent, so it does not advance the per-frame state (TTC,
+        # rear approach window, lane cadence, adaptive resolution); replaying
+        # it would read as a new frame with zero closing speed.
+        self._result_cache = TTLResultCache(maxsize=128, ttl=2.0, isolate=True)
+
+        # Per-camera input size: 320 after 30 empty frames, back to 640 on a hit
+        self._front_res = AdaptiveResolution()
+        self._rear_res = AdaptiveResolution()
 
         # Lane detection is CPU-bound (Hough) and costs more than the GPU
         # inference, so we recompute it only every Nth front frame and cache it.
         self._lane_counter = 0
         self._last_lane: Dict[str, Any] = {"departure": False, "side": None}
 
-        # Front and rear cameras share this single model instance. Serialize the
-        # GPU inference so two concurrent forward passes don't contend on CUDA
-        # (which tanked the fps and could hang the stream).
-        self._infer_lock = threading.Lock()
-        
         # For distance estimation (calibration values)
         # Approximate real widths in meters
         self.REAL_WIDTHS = {
@@ -69,10 +116,24 @@ class RoadSafetyModel:
             "bicycle": 0.5,
             "person": 0.5,
         }
+        # Per-class-id lookup tables for the vectorized post-processing:
+        # array indexing instead of COCO_CLASSES/REAL_WIDTHS dict lookups per box
+        # float64, so rounded distances serialize as e.g. 3.6, not 3.5999999046325684
+        self.REAL_WIDTH_BY_ID = np.full(self.NUM_CLASS_IDS, 1.5, np.float64)  # Default 1.5m
+        self.VALID_CLASS_MASK = np.zeros(self.NUM_CLASS_IDS, bool)
+        for cls_id, class_name in self.COCO_CLASSES.items():
+            self.VALID_CLASS_MASK[cls_id] = True
+            self.REAL_WIDTH_BY_ID[cls_id] = self.REAL_WIDTHS.get(class_name, 1.5)
+        self.IS_VEHICLE = np.zeros(self.NUM_CLASS_IDS, bool)
+        self.IS_VEHICLE[[2, 3, 5, 7]] = True  # car, motorcycle, bus, truck
+        # Distance below which a class raises its FRONT_RULES alert (-inf: never)
+        self.FRONT_ALERT_DIST = np.full(self.NUM_CLASS_IDS, -np.inf, np.float32)
+        for cls_id, rule in self.FRONT_RULES.items():
+            self.FRONT_ALERT_DIST[cls_id] = rule.warning
         self.FOCAL_LENGTH = 800  # Approximate focal length in pixels (calibrated for 640px width)
         
         # For relative speed calculation (track previous distances)
-        self.prev_rear_distance = None
+        self.rear_distance_buf: deque = deque(maxlen=5)  # median-filtered approach speed
         self.prev_front_distance = None
         self.frame_interval = 0.1  # Approximate time between frames (100ms at 10fps)
     
@@ -88,6 +149,32 @@ class RoadSafetyModel:
             return 999  # Too small to measure
         distance = (real_width * focal) / bbox_width
         return round(distance, 1)
+
+    def estimate_distances(self, cls_ids: np.ndarray, bbox_widths: np.ndarray, frame_width: int = 640) -> np.ndarray:
+        """Vectorized `estimate_distance` over arrays of class ids and box widths."""
+        real_widths = self.REAL_WIDTH_BY_ID[cls_ids]
+        bbox_widths = np.asarray(bbox_widths, np.float64)  # YOLO boxes are float32
+        focal = self.FOCAL_LENGTH * (frame_width / 640)
+        with np.errstate(divide="ignore"):
+            distances = np.round(real_widths * focal / bbox_widths, 1)
+        return np.where(bbox_widths < 10, 999, distances)
+
+    def _filter_boxes(self, boxes, frame_width: int, class_mask: np.ndarray) -> _DetBatch:
+        """Host arrays for boxes whose class is set in `class_mask`, plus their distances."""
+        xyxy, confs, cls = boxes_to_numpy(boxes)
+        # Out-of-range ids map to the last slot, which is never a valid class
+        keep = class_mask[np.minimum(cls, self.NUM_CLASS_IDS - 1)]
+        xyxy, confs, cls = xyxy[keep], confs[keep], cls[keep]
+        distances = self.estimate_distances(cls, xyxy[:, 2] - xyxy[:, 0], frame_width)
+        return _DetBatch(cls, confs, *xyxy.T, distances)
+
+    def _detection_dicts(self, det: _DetBatch) -> List[Dict[str, Any]]:
+        """API-boundary view of a batch: one dict per detection."""
+        return [
+            {"box": [x1, y1, x2, y2], "class_name": self.COCO_CLASSES[cls_id],
+             "confidence": conf, "distance_m": distance}
+            for cls_id, conf, x1, y1, x2, y2, distance in zip(*(col.tolist() for col in det))
+        ]
     
     def _traffic_light_color(self, img_rgb, box) -> str:
         """Classify a traffic light's state by color (HSV) — no extra model."""
@@ -156,11 +243,92 @@ class RoadSafetyModel:
         except Exception:
             return {"departure": False, "side": None}
 
-    def analyze_front_camera(self, image_bytes: bytes, frame_width: int = 640) -> Dict[str, Any]:
-        """Analyze front camera: pedestrians, lead-vehicle FCW (TTC), traffic-light state."""
-        image = Image.open(io.BytesIO(image_bytes))
-        img_rgb = np.array(image.convert("RGB"))
+    def _run_detection(self, image_bytes: bytes, image: Image.Image, conf: float, imgsz: int):
+        """Raw YOLO boxes for a frame (shared backbone, cached per frame)."""
+        return self.backbone.detect(image_bytes, image=image, conf=conf, imgsz=imgsz)
+
+    def _interpret_front(self, boxes, img_rgb, frame_width: int, results: Dict[str, Any]) -> None:
+        """Apply the front-camera rules (pedestrians, lights, FCW) to raw boxes."""
         h_img, w_img = img_rgb.shape[:2]
+        lead: Tuple[float, str] | None = None  # (distance, type)
+
+        det = self._filter_boxes(boxes, frame_width, self.VALID_CLASS_MASK)
+        cls, distances = det.cls, det.distance
+        detections = self._detection_dicts(det)
+        results["detections"].extend(detections)
+
+        results["pedestrians_count"] = int((cls == 0).sum())
+
+        # Thresholds are applied as one array compare; only the (few) boxes
+        # that raise an alert are visited, in detection order
+        is_light = cls == self.TRAFFIC_LIGHT_ID
+        alert_mask = (distances < self.FRONT_ALERT_DIST[cls]) | is_light
+        for i in np.nonzero(alert_mask)[0].tolist():
+            detection = detections[i]
+            if not is_light[i]:
+                self.FRONT_RULES[int(cls[i])].emit(detection["distance_m"], results)
+                continue
+
+            state = self._traffic_light_color(img_rgb, detection["box"])
+            results["traffic_light"] = state
+            detection["state"] = state
+            if state == "red":
+                results["alerts"].append({"type": "TRAFFIC_LIGHT", "level": "danger",
+                                          "message": "🚦 Semáforo en ROJO"})
+                if results["risk_level"] == "low":
+                    results["risk_level"] = "medium"
+
+        is_vehicle = self.IS_VEHICLE[cls]
+        results["vehicles_ahead"].extend(
+            {"type": detections[i]["class_name"], "distance": detections[i]["distance_m"]}
+            for i in np.nonzero(is_vehicle)[0].tolist()
+        )
+        # Lead vehicle = ahead, in the central lane, lower half of frame
+        cx = (det.x1 + det.x2) / 2.0
+        in_lane = is_vehicle & (cx > 0.3 * w_img) & (cx < 0.7 * w_img) & (det.y2 > 0.4 * h_img)
+        if in_lane.any():
+            lane_idx = np.nonzero(in_lane)[0]
+            # argmin returns the first of equal minima, like the old strict `<` scan
+            i = int(lane_idx[np.argmin(distances[lane_idx])])
+            lead = (detections[i]["distance_m"], detections[i]["class_name"])
+
+        # ── Forward Collision Warning (lead vehicle, with TTC) ──
+        if lead is not None:
+            dist = lead[0]
+            closing = None
+            ttc = None
+            if self.prev_front_distance is not None:
+                closing = (self.prev_front_distance - dist) / self.frame_interval  # m/s (+approaching)
+                if closing > 0.5:
+                    ttc = round(dist / closing, 1)
+            self.prev_front_distance = dist
+            results["lead_vehicle"] = {
+                "type": lead[1], "distance": dist,
+                "closing_kmh": round((closing or 0) * 3.6, 0),
+                "ttc": ttc,
+            }
+            results["ttc"] = ttc
+
+            if (ttc is not None and ttc < 2.0) or dist < 5:
+                results["alerts"].append({
+                    "type": "FORWARD_COLLISION", "level": "danger",
+                    "message": f"¡FRENA! Colisión en {ttc}s" if ttc else f"¡Vehículo a {dist}m!",
+                    "distance": dist,
+                })
+                results["risk_level"] = "high"
+            elif (ttc is not None and ttc < 4.0) or dist < 12:
+                results["alerts"].append({
+                    "type": "TAILGATING", "level": "warning",
+                    "message": f"Mantén distancia ({dist}m)", "distance": dist,
+                })
+                if results["risk_level"] == "low":
+                    results["risk_level"] = "medium"
+        else:
+            self.prev_front_distance = None
+
+    def _begin_front(self, image: Image.Image) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """Decode the front frame and run the CPU-side lane check."""
+        img_rgb = np.array(image.convert("RGB"))
 
         results: Dict[str, Any] = {
             "detections": [],
@@ -175,7 +343,7 @@ class RoadSafetyModel:
         }
 
         if not self.model:
-            return results
+            return img_rgb, results
 
         # Recompute lane detection only every 3rd frame; reuse the cache in
         # between (it costs more than the YOLO inference and barely changes
@@ -193,110 +361,112 @@ class RoadSafetyModel:
             if results["risk_level"] == "low":
                 results["risk_level"] = "medium"
 
+        return img_rgb, results
+
+    def _finish_front(self, boxes, img_rgb, frame_width: int, results: Dict[str, Any]) -> None:
         try:
-            with self._infer_lock:
-                yolo_results = self.model(image, device=self.device, verbose=False, conf=0.4)
-            boxes = yolo_results[0].boxes if yolo_results else []
-            lead: Tuple[float, str] | None = None  # (distance, type)
-
-            for box in boxes:
-                cls_id = int(box.cls[0])
-                if cls_id not in self.COCO_CLASSES:
-                    continue
-                class_name = self.COCO_CLASSES[cls_id]
-                conf = float(box.conf[0])
-                x1, y1, x2, y2 = box.xyxy[0].tolist()
-                bbox_width = x2 - x1
-                distance = self.estimate_distance(class_name, bbox_width, frame_width)
-                cx = (x1 + x2) / 2.0
-
-                detection = {"box": [x1, y1, x2, y2], "class_name": class_name,
-                             "confidence": conf, "distance_m": distance}
-
-                if class_name == "person":
-                    results["pedestrians_count"] += 1
-                    if distance < 15:
-                        results["alerts"].append({
-                            "type": "PEDESTRIAN",
-                            "level": "danger" if distance < 8 else "warning",
-                            "message": f"¡Peatón a {distance}m!", "distance": distance,
-                        })
-                        results["risk_level"] = "high"
-
-                elif class_name == "traffic_light":
-                    state = self._traffic_light_color(img_rgb, (x1, y1, x2, y2))
-                    results["traffic_light"] = state
-                    detection["state"] = state
-                    if state == "red":
-                        results["alerts"].append({"type": "TRAFFIC_LIGHT", "level": "danger",
-                                                  "message": "🚦 Semáforo en ROJO"})
-                        if results["risk_level"] == "low":
-                            results["risk_level"] = "medium"
-
-                elif class_name == "stop_sign":
-                    results["alerts"].append({"type": "SIGN", "level": "warning",
-                                              "message": "Señal de STOP", "distance": distance})
-
-                elif class_name in ("car", "truck", "bus", "motorcycle"):
-                    results["vehicles_ahead"].append({"type": class_name, "distance": distance})
-                    # Lead vehicle = ahead, in the central lane, lower half of frame
-                    in_lane = (0.3 * w_img < cx < 0.7 * w_img) and (y2 > 0.4 * h_img)
-                    if in_lane and (lead is None or distance < lead[0]):
-                        lead = (distance, class_name)
-
-                elif class_name == "bicycle":
-                    results["alerts"].append({"type": "CYCLIST", "level": "warning",
-                                              "message": f"Ciclista a {distance}m", "distance": distance})
-
-                results["detections"].append(detection)
-
-            # ── Forward Collision Warning (lead vehicle, with TTC) ──
-            if lead is not None:
-                dist = lead[0]
-                closing = None
-                ttc = None
-                if self.prev_front_distance is not None:
-                    closing = (self.prev_front_distance - dist) / self.frame_interval  # m/s (+approaching)
-                    if closing > 0.5:
-                        ttc = round(dist / closing, 1)
-                self.prev_front_distance = dist
-                results["lead_vehicle"] = {
-                    "type": lead[1], "distance": dist,
-                    "closing_kmh": round((closing or 0) * 3.6, 0),
-                    "ttc": ttc,
-                }
-                results["ttc"] = ttc
-
-                if (ttc is not None and ttc < 2.0) or dist < 5:
-                    results["alerts"].append({
-                        "type": "FORWARD_COLLISION", "level": "danger",
-                        "message": f"¡FRENA! Colisión en {ttc}s" if ttc else f"¡Vehículo a {dist}m!",
-                        "distance": dist,
-                    })
-                    results["risk_level"] = "high"
-                elif (ttc is not None and ttc < 4.0) or dist < 12:
-                    results["alerts"].append({
-                        "type": "TAILGATING", "level": "warning",
-                        "message": f"Mantén distancia ({dist}m)", "distance": dist,
-                    })
-                    if results["risk_level"] == "low":
-                        results["risk_level"] = "medium"
-            else:
-                self.prev_front_distance = None
+            self._interpret_front(boxes if boxes is not None else [], img_rgb, frame_width, results)
+        except Exception:
+            logger.exception("Front camera analysis error")
+
+    def analyze_front_camera(self, image_bytes: bytes, frame_width: int = 640) -> Dict[str, Any]:
+        """Analyze front camera: pedestrians, lead-vehicle FCW (TTC), traffic-light state."""
+        key = ("front", image_digest(image_bytes), frame_width)
+        cached = self._result_cache.get(key)
+        if cached is not None:
+            return cached
 
-        except Exception as e:
-            print(f"Front camera analysis error: {e}")
+        image = Image.open(io.BytesIO(image_bytes))
+        img_rgb, results = self._begin_front(image)
+        if not self.model:
+            return results
 
+        try:
+            boxes = self._run_detection(image_bytes, image, conf=0.4, imgsz=self._front_res.imgsz)
+        except Exception:
+            logger.exception("Front camera analysis error")
+            return results
+        self._finish_front(boxes, img_rgb, frame_width, results)
+        self._front_res.update(len(results["detections"]))
+        self._result_cache.put(key, results)
         return results
     
-    def analyze_rear_camera(self, image_bytes: bytes, frame_width: int = 640) -> Dict[str, Any]:
-        """
-        Analyze rear camera for approaching vehicles.
-        Detects if overtaking is safe or dangerous.
-        """
-        image = Image.open(io.BytesIO(image_bytes))
+    def _interpret_rear(self, boxes, frame_width: int, results: Dict[str, Any]) -> None:
+        """Apply the rear-camera rules (approaching vehicles, maneuver safety) to raw boxes."""
+        # Only care about vehicles in rear camera
+        det = self._filter_boxes(boxes, frame_width, self.IS_VEHICLE)
+        detections = self._detection_dicts(det)
+        results["detections"].extend(detections)
+        results["approaching_vehicles"].extend(
+            {"type": d["class_name"], "distance": d["distance_m"]} for d in detections
+        )
+        closest_distance = min((d["distance_m"] for d in detections), default=999)
+        
+        results["closest_vehicle_distance"] = closest_distance if closest_distance < 999 else None
+        
+        # Rolling window of closest distances; a lost track resets it
+        if closest_distance < 999:
+            self.rear_distance_buf.append(closest_distance)
+        else:
+            self.rear_distance_buf.clear()
+        
+        # Calculate approach speed (m/s) based on distance change, comparing the
+        # median of the oldest and newest halves of the window so single-frame
+        # bbox jitter doesn't read as a fast approach
+        approach_speed_ms = 0.0
+        approach_status = "stable"
+        n = len(self.rear_distance_buf)
+        if n >= 2:
+            buf = list(self.rear_distance_buf)
+            k = (n + 1) // 2
+            distance_change = float(np.median(buf[:k]) - np.median(buf[-k:]))  # Positive = approaching
+            approach_speed_ms = distance_change / ((n - k) * self.frame_interval)
+            
+            if approach_speed_ms > 5:  # > 18 km/h approach
+                approach_status = "approaching_fast"
+            elif approach_speed_ms > 1:  # > 3.6 km/h approach
+                approach_status = "approaching_slow"
+            elif approach_speed_ms < -1:  # Moving away
+                approach_status = "moving_away"
+            else:
+                approach_status = "stable"
         
-        results = {
+        results["approach_speed_ms"] = round(approach_speed_ms, 1)
+        results["approach_speed_kmh"] = round(approach_speed_ms * 3.6, 0)
+        results["approach_status"] = approach_status
+        
+        # Determine if maneuver is safe
+        if closest_distance < 10 or approach_status == "approaching_fast":
+            results["safe_to_maneuver"] = False
+            results["risk_level"] = "high"
+            speed_text = f" ({int(results['approach_speed_kmh'])} km/h)" if approach_speed_ms > 1 else ""
+            results["alerts"].append({
+                "type": "APPROACHING_VEHICLE",
+                "level": "danger",
+                "message": f"¡Vehículo a {closest_distance}m{speed_text}! No adelantar",
+                "distance": closest_distance,
+            })
+        elif closest_distance < 20:
+            results["safe_to_maneuver"] = False
+            results["risk_level"] = "medium"
+            results["alerts"].append({
+                "type": "APPROACHING_VEHICLE",
+                "level": "warning",
+                "message": f"Vehículo aproximándose ({closest_distance}m)",
+                "distance": closest_distance,
+            })
+        else:
+            results["safe_to_maneuver"] = True
+            if len(results["approaching_vehicles"]) > 0:
+                results["alerts"].append({
+                    "type": "INFO",
+                    "level": "info",
+                    "message": "Maniobra segura",
+                })
+
+    @staticmethod
+    def _empty_rear_results() -> Dict[str, Any]:
+        return {
             "detections": [],
             "alerts": [],
             "risk_level": "low",
@@ -304,109 +474,82 @@ class RoadSafetyModel:
             "safe_to_maneuver": True,
             "closest_vehicle_distance": None,
         }
-        
+
+    def _finish_rear(self, boxes, frame_width: int, results: Dict[str, Any]) -> None:
+        try:
+            if boxes is not None:
+                self._interpret_rear(boxes, frame_width, results)
+        except Exception:
+            logger.exception("Rear camera analysis error")
+
+    def analyze_rear_camera(self, image_bytes: bytes, frame_width: int = 640) -> Dict[str, Any]:
+        """
+        Analyze rear camera for approaching vehicles.
+        Detects if overtaking is safe or dangerous.
+        """
+        key = ("rear", image_digest(image_bytes), frame_width)
+        cached = self._result_cache.get(key)
+        if cached is not None:
+            return cached
+
+        image = Image.open(io.BytesIO(image_bytes))
+        results = self._empty_rear_results()
         if not self.model:
             return results
         
         try:
-            with self._infer_lock:
-                yolo_results = self.model(image, device=self.device, verbose=False, conf=0.35)
-            
-            if yolo_results and len(yolo_results) > 0:
-                boxes = yolo_results[0].boxes
-                closest_distance = 999
-                
-                for box in boxes:
-                    cls_id = int(box.cls[0])
-                    if cls_id not in self.COCO_CLASSES:
-                        continue
-                    
-                    class_name = self.COCO_CLASSES[cls_id]
-                    
-                    # Only care about vehicles in rear camera
-                    if class_name not in ["car", "truck", "bus", "motorcycle"]:
-                        continue
-                    
-                    conf = float(box.conf[0])
-                    x1, y1, x2, y2 = box.xyxy[0].tolist()
-                    bbox_width = x2 - x1
-                    
-                    distance = self.estimate_distance(class_name, bbox_width, frame_width)
-                    
-                    detection = {
-                        "box": [x1, y1, x2, y2],
-                        "class_name": class_name,
-                        "confidence": conf,
-                        "distance_m": distance,
-                    }
-                    results["detections"].append(detection)
-                    
-                    results["approaching_vehicles"].append({
-                        "type": class_name,
-                        "distance": distance,
-                    })
-                    
-                    if distance < closest_distance:
-                        closest_distance = distance
-                
-                results["closest_vehicle_distance"] = closest_distance if closest_distance < 999 else None
-                
-                # Calculate approach speed (m/s) based on distance change
-                approach_speed_ms = 0.0
-                approach_status = "stable"
-                if self.prev_rear_distance is not None and closest_distance < 999:
-                    distance_change = self.prev_rear_distance - closest_distance  # Positive = approaching
-                    approach_speed_ms = distance_change / self.frame_interval
-                    
-                    if approach_speed_ms > 5:  # > 18 km/h approach
-                        approach_status = "approaching_fast"
-                    elif approach_speed_ms > 1:  # > 3.6 km/h approach
-                        approach_status = "approaching_slow"
-                    elif approach_speed_ms < -1:  # Moving away
-                        approach_status = "moving_away"
-                    else:
-                        approach_status = "stable"
-                
-                self.prev_rear_distance = closest_distance if closest_distance < 999 else None
-                
-                results["approach_speed_ms"] = round(approach_speed_ms, 1)
-                results["approach_speed_kmh"] = round(approach_speed_ms * 3.6, 0)
-                results["approach_status"] = approach_status
-                
-                # Determine if maneuver is safe
-                if closest_distance < 10 or approach_status == "approaching_fast":
-                    results["safe_to_maneuver"] = False
-                    results["risk_level"] = "high"
-                    speed_text = f" ({int(results['approach_speed_kmh'])} km/h)" if approach_speed_ms > 1 else ""
-                    results["alerts"].append({
-                        "type": "APPROACHING_VEHICLE",
-                        "level": "danger",
-                        "message": f"¡Vehículo a {closest_distance}m{speed_text}! No adelantar",
-                        "distance": closest_distance,
-                    })
-                elif closest_distance < 20:
-                    results["safe_to_maneuver"] = False
-                    results["risk_level"] = "medium"
-                    results["alerts"].append({
-                        "type": "APPROACHING_VEHICLE",
-                        "level": "warning",
-                        "message": f"Vehículo aproximándose ({closest_distance}m)",
-                        "distance": closest_distance,
-                    })
-                else:
-                    results["safe_to_maneuver"] = True
-                    if len(results["approaching_vehicles"]) > 0:
-                        results["alerts"].append({
-                            "type": "INFO",
-                            "level": "info",
-                            "message": "Maniobra segura",
-                        })
-        
-        except Exception as e:
-            print(f"Rear camera analysis error: {e}")
-        
+            boxes = self._run_detection(image_bytes, image, conf=0.35, imgsz=self._rear_res.imgsz)
+        except Exception:
+            logger.exception("Rear camera analysis error")
+            return results
+        self._finish_rear(boxes, frame_width, results)
+        self._rear_res.update(len(results["detections"]))
+        self._result_cache.put(key, results)
         return results
 
+    def analyze_both(
+        self, front_bytes: bytes, rear_bytes: bytes, frame_width: int = 640, rear_frame_width: Optional[int] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Analyze front and rear frames with a single batched YOLO forward pass.
+
+        `rear_frame_width` defaults to `frame_width` when both cameras share a
+        resolution. Returns {"front": ..., "rear": ...} with the same shape as
+        the single-camera methods.
+        """
+        if rear_frame_width is None:
+            rear_frame_width = frame_width
+        front_key = ("front", image_digest(front_bytes), frame_width)
+        rear_key = ("rear", image_digest(rear_bytes), rear_frame_width)
+        front_cached = self._result_cache.get(front_key)
+        rear_cached = self._result_cache.get(rear_key)
+        if front_cached is not None and rear_cached is not None:
+            return {"front": front_cached, "rear": rear_cached}
+
+        front_image = Image.open(io.BytesIO(front_bytes))
+        rear_image = Image.open(io.BytesIO(rear_bytes))
+        img_rgb, front = self._begin_front(front_image)
+        rear = self._empty_rear_results()
+        if not self.model:
+            return {"front": front, "rear": rear}
+
+        try:
+            # One batch shares an input size: use the larger of the two
+            front_boxes, rear_boxes = self.backbone.detect_batch(
+                [(front_bytes, front_image), (rear_bytes, rear_image)], [0.4, 0.35],
+                imgsz=max(self._front_res.imgsz, self._rear_res.imgsz),
+            )
+        except Exception:
+            logger.exception("Front/rear camera analysis error")
+            return {"front": front, "rear": rear}
+
+        self._finish_front(front_boxes, img_rgb, frame_width, front)
+        self._finish_rear(rear_boxes, rear_frame_width, rear)
+        self._front_res.update(len(front["detections"]))
+        self._rear_res.update(len(rear["detections"]))
+        self._result_cache.put(front_key, front)
+        self._result_cache.put(rear_key, rear)
+        return {"front": front, "rear": rear}
+
 
 # Singleton instance
 _road_safety_model = None
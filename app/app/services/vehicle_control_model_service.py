@@ -3,12 +3,23 @@ Vehicle Control Model Service
 Detects proximity between workers and industrial vehicles (forklifts, etc.)
 Uses YOLOv8 to detect people and vehicles, then calculates distances.
 """
-from typing import Dict, Any, List, Tuple
-from ultralytics import YOLO
+from typing import Dict, Any
 from PIL import Image
 import io
+import logging
 import torch
 import math
+import numpy as np
+
+from app.app.services.result_cache import TTLResultCache, image_digest
+from app.app.services.yolo_backbone import (
+    AdaptiveResolution,
+    SharedYoloBackbone,
+    boxes_to_numpy,
+    get_shared_yolo,
+)
+
+logger = logging.getLogger(__name__)
 
 
 class VehicleControlModel:
@@ -29,43 +40,139 @@ class VehicleControlModel:
         "truck": "Carretilla/Camión",
     }
     
+    # Class-id filter for the vectorized post-processing
+    _vehicle_ids = np.array(sorted(VEHICLE_CLASSES), dtype=np.int32)
+    
     # Safe distance thresholds (in pixels, calibrated for 640px width)
     DANGER_DISTANCE = 80   # Very close - immediate danger
     WARNING_DISTANCE = 150  # Getting close - caution
+    DANGER_DIST_SQ = DANGER_DISTANCE ** 2
+    WARNING_DIST_SQ = WARNING_DISTANCE ** 2
     
-    def __init__(self):
-        try:
-            self.model = YOLO("yolov8n.pt")
-            print("✅ Vehicle Control model loaded: yolov8n.pt")
-        except Exception as e:
-            print(f"⚠️ Vehicle Control model not found: {e}")
-            self.model = None
+    def __init__(self, backbone: SharedYoloBackbone | None = None):
+        # Same yolov8n instance (and per-frame result cache) as RoadSafetyModel
+        self.backbone = backbone or get_shared_yolo()
+        self.model = self.backbone.model
+        self.device = self.backbone.device
+        # Identical frames (retransmits) within 2s reuse the previous result
+        # (a private copy per caller; hits don't advance the adaptive resolution)
+        self._result_cache = TTLResultCache(maxsize=128, ttl=2.0, isolate=True)
+        # Input size: 320 after 30 empty frames, back to 640 on a hit
+        self._res = AdaptiveResolution()
         
-        if torch.cuda.is_available():
-            self.device = 'cuda:0'
-            print(f"🚀 Vehicle Control using GPU: {torch.cuda.get_device_name(0)}")
+        if self.device != 'cpu':
+            logger.info("🚀 Vehicle Control using GPU: %s", torch.cuda.get_device_name(0))
         else:
-            self.device = 'cpu'
-            print("⚠️ Vehicle Control using CPU")
-    
-    def _get_box_center(self, box: List[float]) -> Tuple[float, float]:
-        """Get center point of bounding box."""
-        x1, y1, x2, y2 = box
-        return ((x1 + x2) / 2, (y1 + y2) / 2)
+            logger.warning("⚠️ Vehicle Control using CPU")
     
-    def _calculate_distance(self, p1: Tuple[float, float], p2: Tuple[float, float]) -> float:
-        """Calculate Euclidean distance between two points."""
-        return math.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
+    def _run_detection(self, image_bytes: bytes, image: Image.Image, conf: float, imgsz: int):
+        """Raw YOLO boxes for a frame (shared backbone, cached per frame)."""
+        return self.backbone.detect(image_bytes, image=image, conf=conf, imgsz=imgsz)
     
-    def _boxes_overlap(self, box1: List[float], box2: List[float]) -> bool:
-        """Check if two bounding boxes overlap."""
-        x1_1, y1_1, x2_1, y2_1 = box1
-        x1_2, y1_2, x2_2, y2_2 = box2
+    def _interpret(self, boxes, frame_width: int, results: Dict[str, Any]) -> None:
+        """Apply the person/vehicle proximity rules to raw boxes."""
+        xyxy, confs, cls = boxes_to_numpy(boxes)
+        is_person = cls == 0
+        keep = is_person | np.isin(cls, self._vehicle_ids)
+        xyxy, confs, cls, is_person = xyxy[keep], confs[keep], cls[keep], is_person[keep]
+        
+        # Dicts only at the API boundary; the pairwise rules below stay on arrays
+        class_names = ["person" if cls_id == 0 else self.VEHICLE_CLASSES[cls_id] for cls_id in cls.tolist()]
+        boxes_list, confs_list = xyxy.tolist(), confs.tolist()
+        results["detections"] = [
+            {"box": coords, "class_name": name, "confidence": conf}
+            for coords, name, conf in zip(boxes_list, class_names, confs_list)
+        ]
+        people = [
+            {"box": boxes_list[i], "confidence": confs_list[i], "type": "person"}
+            for i in np.nonzero(is_person)[0].tolist()
+        ]
+        vehicles = [
+            {
+                "box": boxes_list[i],
+                "confidence": confs_list[i],
+                "type": class_names[i],
+                "display_name": self.INDUSTRIAL_NAMES.get(class_names[i], class_names[i]),
+            }
+            for i in np.nonzero(~is_person)[0].tolist()
+        ]
+        
+        results["people"] = people
+        results["vehicles"] = vehicles
+        results["people_count"] = len(people)
+        results["vehicles_count"] = len(vehicles)
+        
+        if not people or not vehicles:
+            return
+        
+        # Person x vehicle center distances and box overlaps as (P, V) matrices
+        person_boxes = xyxy[is_person].astype(np.float64)
+        vehicle_boxes = xyxy[~is_person].astype(np.float64)
+        person_centers = (person_boxes[:, :2] + person_boxes[:, 2:]) * 0.5
+        vehicle_centers = (vehicle_boxes[:, :2] + vehicle_boxes[:, 2:]) * 0.5
+        # Squared distances: thresholds are squared instead of taking a sqrt per pair
+        deltas = person_centers[:, None, :] - vehicle_centers[None, :, :]
+        sq_distances = np.einsum("pvk,pvk->pv", deltas, deltas)
+        overlaps = ~(
+            (person_boxes[:, None, 2] < vehicle_boxes[None, :, 0])
+            | (vehicle_boxes[None, :, 2] < person_boxes[:, None, 0])
+            | (person_boxes[:, None, 3] < vehicle_boxes[None, :, 1])
+            | (vehicle_boxes[None, :, 3] < person_boxes[:, None, 1])
+        )
         
-        return not (x2_1 < x1_2 or x2_2 < x1_1 or y2_1 < y1_2 or y2_2 < y1_1)
+        # Scale distance threshold based on frame width
+        scale_sq = (frame_width / 640) ** 2
+        danger_dist_sq = self.DANGER_DIST_SQ * scale_sq
+        warning_dist_sq = self.WARNING_DIST_SQ * scale_sq
+        
+        # Only pairs that overlap or are within warning range raise alerts;
+        # argwhere keeps the original person-major order
+        for p_idx, v_idx in np.argwhere(overlaps | (sq_distances < warning_dist_sq)):
+            vehicle = vehicles[v_idx]
+            
+            # Check for overlap first
+            if overlaps[p_idx, v_idx]:
+                results["proximity_alerts"].append({
+                    "type": "COLLISION",
+                    "level": "danger",
+                    "message": f"⚠️ ¡Trabajador en zona de {vehicle['display_name']}!",
+                    "vehicle_type": vehicle["type"],
+                    "distance_px": 0,
+                })
+                results["risk_level"] = "high"
+                continue
+            
+            sq_distance = float(sq_distances[p_idx, v_idx])
+            if sq_distance < danger_dist_sq:
+                results["proximity_alerts"].append({
+                    "type": "PROXIMITY_DANGER",
+                    "level": "danger",
+                    "message": f"🚨 ¡Muy cerca de {vehicle['display_name']}!",
+                    "vehicle_type": vehicle["type"],
+                    "distance_px": round(math.sqrt(sq_distance)),
+                })
+                results["risk_level"] = "high"
+            # Only add warning if no danger already
+            elif results["risk_level"] != "high":
+                results["proximity_alerts"].append({
+                    "type": "PROXIMITY_WARNING",
+                    "level": "warning",
+                    "message": f"⚡ Cerca de {vehicle['display_name']} - Mantener distancia",
+                    "vehicle_type": vehicle["type"],
+                    "distance_px": round(math.sqrt(sq_distance)),
+                })
+                results["risk_level"] = "medium"
+        
+        # Overlapping pairs count as distance 0
+        results["closest_distance"] = 0 if overlaps.any() else round(math.sqrt(float(sq_distances.min())))
     
     def analyze_frame(self, image_bytes: bytes, frame_width: int = 640) -> Dict[str, Any]:
         """Analyze frame for person-vehicle proximity."""
+        key = (image_digest(image_bytes), frame_width)
+        cached = self._result_cache.get(key)
+        if cached is not None:
+            return cached
+        
         image = Image.open(io.BytesIO(image_bytes))
         
         results = {
@@ -83,111 +190,15 @@ class VehicleControlModel:
             return results
         
         try:
-            yolo_results = self.model(image, device=self.device, verbose=False, conf=0.4)
-            
-            if yolo_results and len(yolo_results) > 0:
-                boxes = yolo_results[0].boxes
-                
-                people = []
-                vehicles = []
-                
-                for box in boxes:
-                    cls_id = int(box.cls[0])
-                    conf = float(box.conf[0])
-                    coords = box.xyxy[0].tolist()
-                    
-                    # Person detection
-                    if cls_id == 0:  # person
-                        people.append({
-                            "box": coords,
-                            "confidence": conf,
-                            "type": "person",
-                        })
-                        results["detections"].append({
-                            "box": coords,
-                            "class_name": "person",
-                            "confidence": conf,
-                        })
-                    
-                    # Vehicle detection
-                    elif cls_id in self.VEHICLE_CLASSES:
-                        vehicle_type = self.VEHICLE_CLASSES[cls_id]
-                        vehicles.append({
-                            "box": coords,
-                            "confidence": conf,
-                            "type": vehicle_type,
-                            "display_name": self.INDUSTRIAL_NAMES.get(vehicle_type, vehicle_type),
-                        })
-                        results["detections"].append({
-                            "box": coords,
-                            "class_name": vehicle_type,
-                            "confidence": conf,
-                        })
-                
-                results["people"] = people
-                results["vehicles"] = vehicles
-                results["people_count"] = len(people)
-                results["vehicles_count"] = len(vehicles)
-                
-                # Check proximity between each person and vehicle
-                min_distance = float('inf')
-                
-                for person in people:
-                    person_center = self._get_box_center(person["box"])
-                    
-                    for vehicle in vehicles:
-                        vehicle_center = self._get_box_center(vehicle["box"])
-                        
-                        # Check for overlap first
-                        if self._boxes_overlap(person["box"], vehicle["box"]):
-                            results["proximity_alerts"].append({
-                                "type": "COLLISION",
-                                "level": "danger",
-                                "message": f"⚠️ ¡Trabajador en zona de {vehicle['display_name']}!",
-                                "vehicle_type": vehicle["type"],
-                                "distance_px": 0,
-                            })
-                            results["risk_level"] = "high"
-                            min_distance = 0
-                            continue
-                        
-                        distance = self._calculate_distance(person_center, vehicle_center)
-                        
-                        if distance < min_distance:
-                            min_distance = distance
-                        
-                        # Scale distance threshold based on frame width
-                        scale = frame_width / 640
-                        danger_dist = self.DANGER_DISTANCE * scale
-                        warning_dist = self.WARNING_DISTANCE * scale
-                        
-                        if distance < danger_dist:
-                            results["proximity_alerts"].append({
-                                "type": "PROXIMITY_DANGER",
-                                "level": "danger",
-                                "message": f"🚨 ¡Muy cerca de {vehicle['display_name']}!",
-                                "vehicle_type": vehicle["type"],
-                                "distance_px": round(distance),
-                            })
-                            results["risk_level"] = "high"
-                        elif distance < warning_dist:
-                            # Only add warning if no danger already
-                            if results["risk_level"] != "high":
-                                results["proximity_alerts"].append({
-                                    "type": "PROXIMITY_WARNING",
-                                    "level": "warning",
-                                    "message": f"⚡ Cerca de {vehicle['display_name']} - Mantener distancia",
-                                    "vehicle_type": vehicle["type"],
-                                    "distance_px": round(distance),
-                                })
-                                results["risk_level"] = "medium"
-                
-                if min_distance < float('inf'):
-                    results["closest_distance"] = round(min_distance)
-        
-        except Exception as e:
-            print(f"Vehicle control analysis error: {e}")
+            boxes = self._run_detection(image_bytes, image, conf=0.4, imgsz=self._res.imgsz)
+            if boxes is not None:
+                self._interpret(boxes, frame_width, results)
+        except Exception:
+            logger.exception("Vehicle control analysis error")
+            return results
         
+        self._res.update(len(results["detections"]))
+        self._result_cache.put(key, results)
         return results
 
 
@@ -0,0 +1,235 @@
+"""
+Shared COCO YOLO backbone.
+
+RoadSafetyModel and VehicleControlModel both run yolov8n on the same frames
+with the same preprocessing. They share one instance of this class so the
+weights live once on the GPU, and a small LRU of recent results keyed by the
+frame bytes lets the second service reuse the first one's forward pass.
+"""
+from __future__ import annotations
+
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+from PIL import Image
+from ultralytics.engine.results import Boxes
+from ultralytics.utils.ops import non_max_suppression
+
+from app.app.services.gpu_preprocess import (
+    gpu_preprocess_available,
+    letterbox_arrays,
+    letterbox_jpegs,
+    rescale_boxes,
+)
+from app.app.services.inference_worker import CudaGraphForward, InferenceWorker
+from app.app.services.result_cache import image_digest
+from app.app.services.yolo_engine import load_yolo_detector
+
+logger = logging.getLogger(__name__)
+
+
+def boxes_to_numpy(boxes) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(xyxy[N,4], conf[N], cls[N] int32) host arrays: one copy per tensor
+    instead of a device sync per box."""
+    if boxes is None or len(boxes) == 0:
+        return np.empty((0, 4), np.float32), np.empty(0, np.float32), np.empty(0, np.int32)
+    return (
+        boxes.xyxy.cpu().numpy(),
+        boxes.conf.cpu().numpy(),
+        boxes.cls.cpu().numpy().astype(np.int32),
+    )
+
+
+class AdaptiveResolution:
+    """Input size that drops to `low` after `patience` consecutive empty
+    frames (4x fewer FLOPs on idle scenes) and snaps back to `high` on the
+    first detection."""
+
+    def __init__(self, high: int = 640, low: int = 320, patience: int = 30):
+        self.high = high
+        self.low = low
+        self.patience = patience
+        self.imgsz = high
+        self.empty_streak = 0
+
+    def update(self, num_detections: int) -> None:
+        if num_detections:
+            self.imgsz = self.high
+            self.empty_streak = 0
+        else:
+            self.empty_streak += 1
+            if self.empty_streak > self.patience:
+                self.imgsz = self.low
+
+
+class SharedYoloBackbone:
+    # Lowest confidence any consumer asks for; each service filters the
+    # cached boxes up to its own threshold.
+    BASE_CONF = 0.35
+    IMGSZ = 640
+    NMS_IOU = 0.7  # Ultralytics predictor default
+    # COCO ids any consumer reads (road front/rear, vehicle control); other
+    # classes are dropped before NMS instead of after it. The cached boxes are
+    # shared between services, so this is the union, not a per-service list.
+    CLASSES = [0, 1, 2, 3, 5, 7, 9, 11]
+    # Largest batch sent through detect_batch (front + rear camera); TensorRT
+    # engines are exported with a dynamic batch profile up to this size.
+    MAX_BATCH = 2
+
+    def __init__(self, weights: str = "yolov8n.pt", cache_size: int = 32):
+        try:
+            self.model, self.device = load_yolo_detector(weights, imgsz=self.IMGSZ, batch=self.MAX_BATCH)
+            logger.info("✅ Shared YOLO backbone loaded: %s", weights)
+        except Exception as e:
+            logger.warning("⚠️ Shared YOLO backbone not found: %s", e)
+            self.model = None
+            self.device = 'cuda:0' if torch.cuda.is_available() else 'cpu'
+
+        self._cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, int], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        # All forward passes run on one dedicated thread so concurrent streams
+        # don't contend on CUDA
+        self._worker = InferenceWorker()
+        # CUDA graph replay of the raw network for the fixed-shape GPU
+        # letterboxed batches (PyTorch weights only; TensorRT engines are already fused)
+        self._graph_forward = None
+        # TensorRT engines are built for a fixed input size
+        self.dynamic_imgsz = self.model is not None and isinstance(self.model.model, torch.nn.Module)
+        if (
+            self.dynamic_imgsz
+            and gpu_preprocess_available(self.device)
+            and os.getenv("YOLO_CUDA_GRAPHS", "1") != "0"
+        ):
+            self._graph_forward = CudaGraphForward(self.model.model)
+
+    def warmup(self, sizes: Sequence[int] = (IMGSZ, 320)) -> None:
+        """Push a black frame through every input size the services use, so
+        CUDA graph capture / cuDNN autotuning happen before the first request."""
+        if self.model is None:
+            return
+        if not self.dynamic_imgsz:
+            sizes = (self.IMGSZ,)
+        buf = io.BytesIO()
+        Image.new("RGB", (self.IMGSZ, self.IMGSZ)).save(buf, format="JPEG")
+        frame = (buf.getvalue(), None)
+        for imgsz in sizes:
+            self._worker.run(self._infer, [frame], imgsz)
+
+    def detect(
+        self, image_bytes: bytes, image: Optional[Image.Image] = None, conf: float = BASE_CONF, imgsz: int = IMGSZ
+    ):
+        """Return the YOLO `Boxes` for a frame, filtered to `conf`.
+
+        `image` can be passed when the caller already decoded the bytes.
+        Returns None if the model is unavailable.
+        """
+        return self.detect_batch([(image_bytes, image)], [conf], imgsz)[0]
+
+    def detect_batch(
+        self, frames: List[Tuple[bytes, Optional[Image.Image]]], confs: Sequence[float], imgsz: int = IMGSZ
+    ) -> List[Any]:
+        """Batched `detect`: frames missing from the cache go through a single
+        forward pass, so several cameras share launch and transfer overhead."""
+        if self.model is None:
+            return [None] * len(frames)
+
+        if not self.dynamic_imgsz:
+            imgsz = self.IMGSZ
+        keys = [(image_digest(image_bytes), imgsz) for image_bytes, _ in frames]
+        out: List[Any] = [None] * len(frames)
+        pending: List[int] = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                boxes = self._cache.get(key)
+                if boxes is not None:
+                    self._cache.move_to_end(key)
+                    out[i] = boxes
+                else:
+                    pending.append(i)
+
+        if pending:
+            # Inference runs without the cache lock, so cache hits don't queue
+            # behind an in-flight forward pass. Two concurrent misses on the
+            # same frame may both infer it; the later insert just wins.
+            inferred = self._worker.run(self._infer, [frames[i] for i in pending], imgsz)
+            with self._lock:
+                for i, boxes in zip(pending, inferred):
+                    out[i] = boxes
+                    if boxes is not None:
+                        self._cache[keys[i]] = boxes
+                        self._cache.move_to_end(keys[i])
+                while len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+
+        for i, conf in enumerate(confs):
+            boxes = out[i]
+            if boxes is not None and conf > self.BASE_CONF:
+                out[i] = boxes[boxes.conf >= conf]
+        return out
+
+    @staticmethod
+    def _open(image_bytes: bytes, image: Optional[Image.Image]) -> Image.Image:
+        return image if image is not None else Image.open(io.BytesIO(image_bytes))
+
+    def _infer(self, frames: List[Tuple[bytes, Optional[Image.Image]]], imgsz: int) -> List[Any]:
+        """One forward pass over `frames`. Decodes on the GPU (nvJPEG) when
+        possible, so PIL never decodes the pixels; otherwise decodes with PIL
+        and still letterboxes on the GPU. CPU hosts use the plain YOLO call."""
+        gpu_batch = letterbox_jpegs([image_bytes for image_bytes, _ in frames], self.device, imgsz)
+        if gpu_batch is None and gpu_preprocess_available(self.device):
+            # CPU decode, but resize/normalize on the GPU
+            gpu_batch = letterbox_arrays(
+                [np.asarray(self._open(image_bytes, image).convert("RGB")) for image_bytes, image in frames],
+                self.device, imgsz,
+            )
+        if gpu_batch is not None:
+            batch, ratios, shapes = gpu_batch
+            return [
+                rescale_boxes(boxes, ratio, shape) if boxes is not None else None
+                for boxes, ratio, shape in zip(self._forward_gpu(batch), ratios, shapes)
+            ]
+
+        images = [self._open(image_bytes, image) for image_bytes, image in frames]
+        yolo_results = self.model(
+            images, device=self.device, verbose=False, conf=self.BASE_CONF, imgsz=imgsz, classes=self.CLASSES
+        )
+        return [result.boxes for result in yolo_results]
+
+
+    def _forward_gpu(self, batch: torch.Tensor) -> List[Any]:
+        """Boxes (in letterbox coords) for a CUDA batch, via graph replay + NMS
+        when available, otherwise through the regular Ultralytics call."""
+        if self._graph_forward is not None:
+            try:
+                preds = self._graph_forward(batch)
+                dets = non_max_suppression(
+                    preds, self.BASE_CONF, self.NMS_IOU, classes=self.CLASSES, max_det=300
+                )
+                return [Boxes(det, batch.shape[2:]) for det in dets]
+            except Exception as e:
+                logger.warning("⚠️ CUDA graph replay failed (%s); using eager YOLO calls", e)
+                self._graph_forward = None
+        yolo_results = self.model(batch, device=self.device, verbose=False, conf=self.BASE_CONF, classes=self.CLASSES)
+        return [result.boxes for result in yolo_results]
+
+
+_backbone_lock = threading.Lock()
+_backbone: Optional[SharedYoloBackbone] = None
+
+
+def get_shared_yolo() -> SharedYoloBackbone:
+    # Lock-free once built; the lock only keeps concurrent first calls from
+    # loading a second copy of the weights and its inference worker
+    global _backbone
+    if _backbone is None:
+        with _backbone_lock:
+            if _backbone is None:
+                _backbone = SharedYoloBackbone()
+    return _backbone
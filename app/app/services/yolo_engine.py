@@ -0,0 +1,83 @@
+"""
+YOLO detector loader with optional TensorRT acceleration.
+
+Set YOLO_TENSORRT=fp16 (or int8) on a CUDA host to export the .pt weights to a
+TensorRT engine once and serve inference from it. The engine is cached next to
+the weights, so only the first start pays the export cost. Any failure falls
+back to the PyTorch weights; CPU hosts always use the .pt file.
+Callers that batch frames pass `batch`: the engine is then built with a
+dynamic batch dimension up to that size, so smaller batches don't need a rebuild.
+"""
+from __future__ import annotations
+
+import os
+from typing import Tuple
+
+import numpy as np
+import torch
+from ultralytics import YOLO
+
+TENSORRT_MODES = {"fp16", "int8"}
+
+
+def _engine_path(weights: str, mode: str, batch: int = 1) -> str:
+    stem, _ = os.path.splitext(weights)
+    suffix = f".b{batch}" if batch > 1 else ""
+    return f"{stem}.{mode}{suffix}.engine"
+
+
+def _export_engine(weights: str, mode: str, imgsz: int, batch: int = 1) -> str:
+    """Export `weights` to a TensorRT engine and return its path."""
+    target = _engine_path(weights, mode, batch)
+    if os.path.exists(target):
+        return target
+    kwargs = {"format": "engine", "device": 0, "imgsz": imgsz, "workspace": 4}
+    if batch > 1:
+        # Optimization profile covers batch 1..`batch`
+        kwargs["batch"] = batch
+        kwargs["dynamic"] = True
+    if mode == "int8":
+        # INT8 needs a calibration set (~500 representative images)
+        kwargs["int8"] = True
+        kwargs["data"] = os.getenv("YOLO_TENSORRT_CALIB_DATA", "coco.yaml")
+    else:
+        kwargs["half"] = True
+    exported = YOLO(weights).export(**kwargs)
+    os.replace(exported, target)
+    return target
+
+
+def load_yolo_detector(weights: str = "yolov8n.pt", imgsz: int = 640, batch: int = 1) -> Tuple[YOLO, str]:
+    """Load a detection model, preferring a TensorRT engine on GPU hosts.
+
+    `batch` is the largest batch the caller will run through the engine.
+
+    Returns (model, device). Raises whatever YOLO raises if even the .pt
+    weights cannot be loaded.
+    """
+    device = "cuda:0" if torch.cuda.is_available() else "cpu"
+    mode = os.getenv("YOLO_TENSORRT", "").lower()
+
+    model = None
+    if device != "cpu" and mode in TENSORRT_MODES:
+        try:
+            engine = _export_engine(weights, mode, imgsz, batch)
+            model = YOLO(engine, task="detect")
+            print(f"🚀 TensorRT {mode.upper()} engine loaded: {engine}", flush=True)
+        except Exception as e:
+            print(f"⚠️ TensorRT export/load failed ({e}); using PyTorch weights", flush=True)
+            model = None
+
+    if model is None:
+        model = YOLO(weights)
+        if device != "cpu":
+            model.to(device)
+
+    # First call builds the TensorRT plan / autotunes cuDNN; pay it here
+    # instead of on the first real frame.
+    try:
+        model(np.zeros((imgsz, imgsz, 3), dtype=np.uint8), device=device, verbose=False, imgsz=imgsz)
+    except Exception as e:
+        print(f"⚠️ YOLO warmup failed: {e}", flush=True)
+
+    return model, device
@@ -15,6 +15,22 @@ except ImportError:
     HAS_ROBOFLOW = False
     print("Warning: Roboflow not installed. Using synthetic dataset.")
 
+# libjpeg-turbo (SIMD DCT/color conversion) for the synthetic JPEGs; Pillow otherwise
+try:
+    from turbojpeg import TJPF_RGB, TurboJPEG
+    _turbojpeg = TurboJPEG()
+except Exception:
+    _turbojpeg = None
+
+
+def _save_jpeg(path: str, img_array: np.ndarray) -> None:
+    """Encode an RGB uint8 array to a JPEG file."""
+    if _turbojpeg is None:
+        Image.fromarray(img_array).save(path)
+        return
+    with open(path, "wb") as f:
+        f.write(_turbojpeg.encode(img_array, quality=85, pixel_format=TJPF_RGB))
+
 
 def download_real_dataset():
     """
@@ -47,30 +63,37 @@ def create_synthetic_dataset():
     
     print("Generating synthetic dataset for CI/CD demo...")
     
+    rng = np.random.default_rng()
+    
     # Create synthetic images and labels
     for split in ['train', 'valid']:
         num_samples = 10 if split == 'train' else 5
         
-        for i in range(num_samples):
-            # Create a simple synthetic image (640x640 blank with random noise)
-            img_array = np.random.randint(0, 255, (640, 640, 3), dtype=np.uint8)
-            img = Image.fromarray(img_array)
-            
+        # Draw every image and box of the split in one RNG call each
+        # Simple synthetic images (640x640 random noise)
+        images = rng.integers(0, 255, (num_samples, 640, 640, 3), dtype=np.uint8)
+        # 1-2 random bounding boxes per image
+        counts = rng.integers(1, 3, size=num_samples)
+        total = int(counts.sum())
+        class_ids = rng.integers(0, 4, size=total).tolist()  # 0-3 for our 4 classes
+        cxs = rng.uniform(0.2, 0.8, size=total).tolist()
+        cys = rng.uniform(0.2, 0.8, size=total).tolist()
+        ws = rng.uniform(0.1, 0.3, size=total).tolist()
+        hs = rng.uniform(0.1, 0.3, size=total).tolist()
+        ends = np.cumsum(counts).tolist()
+        
+        start = 0
+        for i, end in enumerate(ends):
             # Save image
             img_path = f"{dataset_dir}/{split}/images/sample_{i}.jpg"
-            img.save(img_path)
+            _save_jpeg(img_path, images[i])
             
             # Create label file (YOLO format: class_id center_x center_y width height)
             label_path = f"{dataset_dir}/{split}/labels/sample_{i}.txt"
+            rows = zip(class_ids[start:end], cxs[start:end], cys[start:end], ws[start:end], hs[start:end])
             with open(label_path, "w") as f:
-                # Add 1-2 random bounding boxes
-                for j in range(np.random.randint(1, 3)):
-                    class_id = np.random.randint(0, 4)  # 0-3 for our 4 classes
-                    cx = np.random.uniform(0.2, 0.8)
-                    cy = np.random.uniform(0.2, 0.8)
-                    w = np.random.uniform(0.1, 0.3)
-                    h = np.random.uniform(0.1, 0.3)
-                    f.write(f"{class_id} {cx} {cy} {w} {h}\n")
+                f.write("".join(f"{class_id} {cx} {cy} {w} {h}\n" for class_id, cx, cy, w, h in rows))
+            start = end
     
     print(f"✓ Synthetic dataset created at {dataset_dir}")
     print("✓ Training set: 10 images with labels")
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# test_api / test_compliance / test_model import the backend as ``app.*``,
+# which lives under <repo>/app.
+APP_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "app"))
+if APP_ROOT not in sys.path:
+    sys.path.insert(0, APP_ROOT)
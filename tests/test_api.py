@@ -1,3 +1,6 @@
+import base64
+import json
+
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
@@ -91,3 +94,61 @@ class TestDetectEndpoint:
         assert response.status_code == 200
         # Prometheus metrics are in plain text format
         assert "http_request" in response.text or "process_" in response.text
+
+
+def _jpeg_b64(width, height):
+    buf = io.BytesIO()
+    Image.new('RGB', (width, height), color='gray').save(buf, format='JPEG')
+    return base64.b64encode(buf.getvalue()).decode()
+
+
+class _FakeRoadModel:
+    """Stands in for the YOLO road model: one 100x100 box per camera."""
+
+    def __init__(self):
+        self.calls = []
+
+    def analyze_both(self, front_bytes, rear_bytes, frame_width=640, rear_frame_width=None):
+        self.calls.append((frame_width, rear_frame_width))
+        det = {"box": [0, 0, 100, 100], "confidence": 0.9, "class_id": 2, "class_name": "car"}
+        return {"front": {"detections": [det]}, "rear": {"detections": [det]}}
+
+
+class TestFrontCamStream:
+    """Test suite for the combined front + rear frame path of /ws/front-cam-stream."""
+
+    @pytest.mark.parametrize(
+        "rear_display,rear_box",
+        [
+            pytest.param({}, [0.0, 0.0, 100.0, 100.0], id="rear-frame-pixels"),
+            pytest.param(
+                {"rear_display_width": 960, "rear_display_height": 720},
+                [0.0, 0.0, 300.0, 300.0],
+                id="rear-display-size",
+            ),
+        ],
+    )
+    def test_rear_detections_scaled_from_rear_frame(self, client, monkeypatch, rear_display, rear_box):
+        """Rear boxes are scaled from the rear frame's own size to the rear display
+        size, never with the front frame's capture or display dimensions."""
+        from app.app.services import road_safety_model_service
+
+        fake = _FakeRoadModel()
+        monkeypatch.setattr(road_safety_model_service, "get_road_safety_model", lambda: fake)
+
+        with client.websocket_connect("/ws/front-cam-stream") as ws:
+            assert ws.receive_json()["type"] == "ready"
+            ws.send_text(json.dumps({
+                "image": _jpeg_b64(640, 480),
+                "rear_image": _jpeg_b64(320, 240),
+                "capture_width": 640,
+                "capture_height": 480,
+                "display_width": 1280,
+                "display_height": 960,
+                **rear_display,
+            }))
+            data = ws.receive_json()
+
+        assert fake.calls == [(640, 320)]
+        assert data["detections"][0]["box"] == [0.0, 0.0, 200.0, 200.0]
+        assert data["rear"]["detections"][0]["box"] == rear_box
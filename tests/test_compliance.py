@@ -2,91 +2,44 @@ import pytest
 from app.services.compliance_service import ComplianceService
 
 
-@pytest.fixture
+HELMET = {"class_name": "helmet", "box": [100, 100, 200, 200], "confidence": 0.95}
+VEST = {"class_name": "vest", "box": [100, 200, 200, 300], "confidence": 0.90}
+NO_HELMET = {"class_name": "no-helmet", "box": [100, 100, 200, 200], "confidence": 0.95}
+NO_VEST = {"class_name": "no-vest", "box": [100, 200, 200, 300], "confidence": 0.90}
+
+
+@pytest.fixture(scope="module")
 def compliance_service():
-    """Fixture to create a ComplianceService instance."""
+    """Fixture to create a ComplianceService instance (stateless, shared per module)."""
     return ComplianceService()
 
 
 class TestComplianceService:
     """Test suite for ComplianceService."""
-    
-    def test_no_violations_with_compliant_detections(self, compliance_service):
-        """Test that compliant detections (helmet, vest) produce no violations."""
-        detections = [
-            {
-                "class_name": "helmet",
-                "box": [100, 100, 200, 200],
-                "confidence": 0.95
-            },
-            {
-                "class_name": "vest",
-                "box": [100, 200, 200, 300],
-                "confidence": 0.90
-            }
-        ]
-        
-        violations = compliance_service.check_compliance(detections)
-        
-        assert len(violations) == 0, "Should have no violations with compliant detections"
-    
-    def test_violation_detected_for_no_helmet(self, compliance_service):
-        """Test that no-helmet detection creates a HIGH severity violation."""
-        detections = [
-            {
-                "class_name": "no-helmet",
-                "box": [100, 100, 200, 200],
-                "confidence": 0.95
-            }
-        ]
-        
+
+    @pytest.mark.parametrize(
+        "detections,expected",
+        [
+            pytest.param([HELMET, VEST], {}, id="compliant"),
+            pytest.param([NO_HELMET], {"NO_HELMET": "HIGH"}, id="no-helmet"),
+            pytest.param([NO_VEST], {"NO_VEST": "MEDIUM"}, id="no-vest"),
+            pytest.param(
+                [NO_HELMET, NO_VEST],
+                {"NO_HELMET": "HIGH", "NO_VEST": "MEDIUM"},
+                id="multiple",
+            ),
+            pytest.param([], {}, id="empty"),
+        ],
+    )
+    def test_check_compliance(self, compliance_service, detections, expected):
+        """Each violation type is reported once with its severity; compliant gear is ignored."""
         violations = compliance_service.check_compliance(detections)
-        
-        assert len(violations) == 1, "Should have exactly one violation"
-        assert violations[0]["violation_type"] == "NO_HELMET"
-        assert violations[0]["severity"] == "HIGH"
+
+        assert len(violations) == len(expected)
+        assert {v["violation_type"]: v["severity"] for v in violations} == expected
+
+    def test_violation_carries_confidence(self, compliance_service):
+        """Test that the detection confidence is copied into the violation details."""
+        violations = compliance_service.check_compliance([NO_HELMET])
+
         assert violations[0]["details"]["confidence"] == 0.95
-    
-    def test_violation_detected_for_no_vest(self, compliance_service):
-        """Test that no-vest detection creates a MEDIUM severity violation."""
-        detections = [
-            {
-                "class_name": "no-vest",
-                "box": [100, 200, 200, 300],
-                "confidence": 0.90
-            }
-        ]
-        
-        violations = compliance_service.check_compliance(detections)
-        
-        assert len(violations) == 1, "Should have exactly one violation"
-        assert violations[0]["violation_type"] == "NO_VEST"
-        assert violations[0]["severity"] == "MEDIUM"
-    
-    def test_multiple_violations(self, compliance_service):
-        """Test detection of multiple violations simultaneously."""
-        detections = [
-            {
-                "class_name": "no-helmet",
-                "box": [100, 100, 200, 200],
-                "confidence": 0.95
-            },
-            {
-                "class_name": "no-vest",
-                "box": [100, 200, 200, 300],
-                "confidence": 0.90
-            }
-        ]
-        
-        violations = compliance_service.check_compliance(detections)
-        
-        assert len(violations) == 2, "Should have two violations"
-        violation_types = {v["violation_type"] for v in violations}
-        assert "NO_HELMET" in violation_types
-        assert "NO_VEST" in violation_types
-    
-    def test_empty_detections(self, compliance_service):
-        """Test that empty detections list produces no violations."""
-        violations = compliance_service.check_compliance([])
-        
-        assert len(violations) == 0, "Should have no violations with empty detections"
@@ -0,0 +1,83 @@
+import io
+
+import pytest
+import torch
+from PIL import Image
+
+from app.app.services.road_safety_model_service import RoadSafetyModel
+
+
+class _Boxes:
+    """Minimal stand-in for Ultralytics `Boxes`: rows of (x1, y1, x2, y2, conf, cls)."""
+
+    def __init__(self, rows):
+        t = torch.tensor(rows, dtype=torch.float32)
+        self.xyxy, self.conf, self.cls = t[:, :4], t[:, 4], t[:, 5]
+
+    def __len__(self):
+        return len(self.xyxy)
+
+
+class _StubBackbone:
+    """Serves fixed boxes instead of running YOLO."""
+
+    device = "cpu"
+    model = object()  # the analyzers only check that a model is loaded
+
+    def __init__(self, rows):
+        self.boxes = _Boxes(rows)
+
+    def detect(self, image_bytes, image=None, conf=0.35, imgsz=640):
+        return self.boxes
+
+    def detect_batch(self, frames, confs, imgsz=640):
+        return [self.boxes] * len(frames)
+
+
+# A car 400px wide, centred in the lower half of a 640x480 frame: 1.8m * 800 / 400 = 3.6m
+CAR_AHEAD = [120.0, 200.0, 520.0, 460.0, 0.9, 2.0]
+
+
+@pytest.fixture
+def frame_bytes():
+    buf = io.BytesIO()
+    Image.new('RGB', (640, 480), color='gray').save(buf, format='JPEG')
+    return buf.getvalue()
+
+
+class TestRoadSafetyModel:
+    """Test suite for RoadSafetyModel post-processing (YOLO replaced by a stub)."""
+
+    def test_distance_is_rounded(self, frame_bytes):
+        """Distances come out as the exact 1-decimal value, in detections and alert text."""
+        model = RoadSafetyModel(backbone=_StubBackbone([CAR_AHEAD]))
+
+        results = model.analyze_front_camera(frame_bytes)
+
+        assert results["detections"][0]["distance_m"] == 3.6
+        assert results["lead_vehicle"]["distance"] == 3.6
+        assert results["alerts"][-1]["message"] == "¡Vehículo a 3.6m!"
+
+    def test_cache_hit_returns_private_copy(self, frame_bytes):
+        """Mutating one caller's result doesn't leak into a later cache hit."""
+        model = RoadSafetyModel(backbone=_StubBackbone([CAR_AHEAD]))
+
+        first = model.analyze_front_camera(frame_bytes)
+        first["alerts"].clear()
+        first["detections"][0]["distance_m"] = 0.0
+        again = model.analyze_front_camera(frame_bytes)
+
+        assert again is not first
+        assert again["detections"][0]["distance_m"] == 3.6
+        assert again["alerts"][-1]["message"] == "¡Vehículo a 3.6m!"
+
+    def test_cache_hit_keeps_tracking_state(self, frame_bytes):
+        """A retransmitted frame replays its result without advancing TTC or lane state."""
+        model = RoadSafetyModel(backbone=_StubBackbone([CAR_AHEAD]))
+
+        first = model.analyze_front_camera(frame_bytes)
+        state = (model.prev_front_distance, model._lane_counter, model._front_res.empty_streak)
+        again = model.analyze_front_camera(frame_bytes)
+
+        assert again == first
+        assert (model.prev_front_distance, model._lane_counter, model._front_res.empty_streak) == state
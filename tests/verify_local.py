@@ -1,40 +1,61 @@
-import requests
+import asyncio
+import httpx
 import io
 from PIL import Image
 import sys
 
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+URL = "http://127.0.0.1:8000/detect"
+
 def create_dummy_image():
     img = Image.new('RGB', (100, 100), color = 'red')
     img_byte_arr = io.BytesIO()
     img.save(img_byte_arr, format='JPEG')
-    img_byte_arr.seek(0)
-    return img_byte_arr
-
-def test_api():
-    url = "http://127.0.0.1:8000/detect"
-    image = create_dummy_image()
-    files = {'file': ('test.jpg', image, 'image/jpeg')}
-    
+    return img_byte_arr.getvalue()
+
+# Encoded once; every request reuses the same bytes
+_DUMMY_JPEG = create_dummy_image()
+
+def report(response):
+    print(f"Status Code: {response.status_code}")
+    print(f"Response: {response.json()}")
+
+    if response.status_code == 200:
+        data = response.json()
+        print("SUCCESS: API returned 200")
+        print(f"Detections: {len(data['detections'])}")
+        print(f"Violations: {len(data['violations'])}")
+        print(f"Compliant: {data['compliant']}")
+        if data['violations']:
+            print("Violations found:", data['violations'])
+        return True
+    print("FAILURE: API returned error")
+    return False
+
+async def test_api(count=1):
+    """POST the dummy image `count` times concurrently over one pooled client."""
     try:
-        response = requests.post(url, files=files)
-        print(f"Status Code: {response.status_code}")
-        print(f"Response: {response.json()}")
-        
-        if response.status_code == 200:
-            data = response.json()
-            print("SUCCESS: API returned 200")
-            print(f"Detections: {len(data['detections'])}")
-            print(f"Violations: {len(data['violations'])}")
-            print(f"Compliant: {data['compliant']}")
-            if data['violations']:
-                print("Violations found:", data['violations'])
-        else:
-            print("FAILURE: API returned error")
-            sys.exit(1)
-            
+        async with httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=20),
+        ) as client:
+            responses = await asyncio.gather(*(
+                client.post(URL, files={'file': ('test.jpg', _DUMMY_JPEG, 'image/jpeg')})
+                for _ in range(count)
+            ))
     except Exception as e:
         print(f"Error: {e}")
         sys.exit(1)
 
+    if not all([report(r) for r in responses]):
+        sys.exit(1)
+
 if __name__ == "__main__":
-    test_api()
+    # Optional argument: number of concurrent requests (default 1)
+    asyncio.run(test_api(int(sys.argv[1]) if len(sys.argv) > 1 else 1))
@@ -1,12 +1,19 @@
-import requests
+import asyncio
+import httpx
 import sys
-import time
 
-def test_metrics():
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+async def test_metrics():
     url = "http://127.0.0.1:8000/metrics"
     
     try:
-        response = requests.get(url)
+        async with httpx.AsyncClient(http2=HTTP2_AVAILABLE, timeout=30.0) as client:
+            response = await client.get(url)
         print(f"Status Code: {response.status_code}")
         
         if response.status_code == 200:
@@ -24,4 +31,4 @@ def test_metrics():
         sys.exit(1)
 
 if __name__ == "__main__":
-    test_metrics()
+    asyncio.run(test_metrics())